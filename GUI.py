@@ -1,15 +1,16 @@
 # GUI.py
-from PyQt5.QtCore import (QCoreApplication, QMetaObject, QRect, QSize)
+from PyQt5.QtCore import (QCoreApplication, QMetaObject, QRect, QSize, Qt)
 from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import *
+from preview_widget import PreviewPlot
 
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
         if MainWindow.objectName():
             MainWindow.setObjectName(u"MainWindow")
-        MainWindow.resize(512, 456)
-        MainWindow.setMinimumSize(QSize(512, 456))
-        MainWindow.setMaximumSize(QSize(512, 456))
+        MainWindow.resize(1000, 480)
+        MainWindow.setMinimumSize(QSize(1000, 480))
+        MainWindow.setMaximumSize(QSize(1000, 480))
         MainWindow.setStyleSheet(u"background-color: rgb(91, 155, 213);")
         self.centralwidget = QWidget(MainWindow)
         self.centralwidget.setObjectName(u"centralwidget")
@@ -100,13 +101,18 @@ class Ui_MainWindow(object):
 
         self.label_8 = QLabel(self.centralwidget)
         self.label_8.setObjectName(u"label_8")
-        self.label_8.setGeometry(QRect(380, 410, 121, 31))
+        self.label_8.setGeometry(QRect(380, 420, 121, 31))
         self.label_8.setFont(font4)
 
-        self.Signal = QComboBox(self.centralwidget)
-        self.Signal.addItems(["Actual Speed", "Set Speed", "Feed Forward", "AC Switch"])
+        # Chọn được nhiều tín hiệu, tất cả được xử lý trong một lần đọc file
+        self.Signal = QListWidget(self.centralwidget)
+        for name in ["Actual Speed", "Set Speed", "Feed Forward", "AC Switch"]:
+            item = QListWidgetItem(name, self.Signal)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Unchecked)
+        self.Signal.item(0).setCheckState(Qt.Checked)
         self.Signal.setObjectName(u"Signal")
-        self.Signal.setGeometry(QRect(40, 370, 131, 31))
+        self.Signal.setGeometry(QRect(40, 370, 161, 81))
         self.Signal.setStyleSheet(u"background-color: rgb(201, 201, 201);")
 
         self.Input_button = QPushButton(self.centralwidget)
@@ -127,6 +133,71 @@ class Ui_MainWindow(object):
         self.Start_button.setFont(font3)
         self.Start_button.setStyleSheet(u"background-color: rgb(201, 201, 201);")
 
+        self.Cancel_button = QPushButton(self.centralwidget)
+        self.Cancel_button.setObjectName(u"Cancel_button")
+        self.Cancel_button.setGeometry(QRect(300, 370, 81, 31))
+        self.Cancel_button.setFont(font3)
+        self.Cancel_button.setStyleSheet(u"background-color: rgb(201, 201, 201);")
+        self.Cancel_button.setEnabled(False)
+
+        self.Report_checkbox = QCheckBox(self.centralwidget)
+        self.Report_checkbox.setObjectName(u"Report_checkbox")
+        self.Report_checkbox.setGeometry(QRect(215, 370, 81, 21))
+        self.Report_checkbox.setFont(font3)
+
+        self.Profile_checkbox = QCheckBox(self.centralwidget)
+        self.Profile_checkbox.setObjectName(u"Profile_checkbox")
+        self.Profile_checkbox.setGeometry(QRect(215, 395, 81, 21))
+        self.Profile_checkbox.setFont(font3)
+
+        self.Incremental_checkbox = QCheckBox(self.centralwidget)
+        self.Incremental_checkbox.setObjectName(u"Incremental_checkbox")
+        self.Incremental_checkbox.setGeometry(QRect(300, 340, 91, 21))
+        self.Incremental_checkbox.setFont(font3)
+
+        self.Watch_checkbox = QCheckBox(self.centralwidget)
+        self.Watch_checkbox.setObjectName(u"Watch_checkbox")
+        self.Watch_checkbox.setGeometry(QRect(400, 340, 81, 21))
+        self.Watch_checkbox.setFont(font3)
+
+        self.Compare_checkbox = QCheckBox(self.centralwidget)
+        self.Compare_checkbox.setObjectName(u"Compare_checkbox")
+        self.Compare_checkbox.setGeometry(QRect(215, 340, 81, 21))
+        self.Compare_checkbox.setFont(font3)
+
+        self.Output_format = QComboBox(self.centralwidget)
+        self.Output_format.setObjectName(u"Output_format")
+        self.Output_format.setGeometry(QRect(215, 422, 91, 24))
+        self.Output_format.setFont(font3)
+        self.Output_format.addItems(["csv", "csv-fast", "csv-gz", "parquet", "feather"])
+
+        # Xem trước tín hiệu của một file để chọn Start/End Time
+        self.label_9 = QLabel(self.centralwidget)
+        self.label_9.setObjectName(u"label_9")
+        self.label_9.setGeometry(QRect(520, 30, 81, 21))
+        self.label_9.setFont(font2)
+
+        self.Preview_file = QComboBox(self.centralwidget)
+        self.Preview_file.setObjectName(u"Preview_file")
+        self.Preview_file.setGeometry(QRect(520, 60, 361, 24))
+        self.Preview_file.setFont(font3)
+        self.Preview_file.setStyleSheet(u"background-color: rgb(201, 201, 201);")
+
+        self.Preview_button = QPushButton(self.centralwidget)
+        self.Preview_button.setObjectName(u"Preview_button")
+        self.Preview_button.setGeometry(QRect(890, 57, 91, 31))
+        self.Preview_button.setFont(font3)
+        self.Preview_button.setStyleSheet(u"background-color: rgb(201, 201, 201);")
+
+        self.Preview = PreviewPlot(self.centralwidget)
+        self.Preview.setObjectName(u"Preview")
+        self.Preview.setGeometry(QRect(520, 100, 461, 321))
+
+        self.label_10 = QLabel(self.centralwidget)
+        self.label_10.setObjectName(u"label_10")
+        self.label_10.setGeometry(QRect(520, 425, 461, 21))
+        self.label_10.setFont(font3)
+
         MainWindow.setCentralWidget(self.centralwidget)
 
         self.statusbar = QStatusBar(MainWindow)
@@ -148,4 +219,13 @@ class Ui_MainWindow(object):
         self.Input_button.setText("Select")
         self.Output_button.setText("Select")
         self.Start_button.setText("Start")
+        self.Cancel_button.setText("Cancel")
+        self.Report_checkbox.setText("Report")
+        self.Profile_checkbox.setText("Profile")
+        self.Incremental_checkbox.setText("Incremental")
+        self.Watch_checkbox.setText("Watch")
+        self.Compare_checkbox.setText("Compare")
+        self.label_9.setText("Preview")
+        self.Preview_button.setText("Preview")
+        self.label_10.setText("Lăn chuột: zoom | kéo phải: dịch | kéo trái: chọn Start/End")
         self.label_8.setText("Design by: TânCN")
\ No newline at end of file
@@ -0,0 +1,84 @@
+import gzip
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+from types import SimpleNamespace
+
+# Phần mở rộng của file nén được tìm file CSV bên trong
+ARCHIVE_PATTERNS = ["*.zip", "*.gz"]
+
+class ArchiveMember:
+    """Một file CSV nằm trong file nén .zip hoặc .csv.gz, dùng thay cho Path.
+
+    Có các thuộc tính/hàm mà quy trình xử lý dùng với Path (name, stem,
+    stat(), resolve()) và open() để đọc nội dung đã giải nén theo luồng,
+    không giải nén ra đĩa. name/stem lấy theo tên file bên trong nên file
+    output được đặt tên theo file CSV gốc.
+    """
+
+    def __init__(self, archive: Path, member: str, size=None):
+        self.archive = Path(archive)
+        self.member = member
+        # Kích thước nén của file bên trong (với .gz là kích thước cả file)
+        self.size = size
+        self.name = PurePosixPath(member).name
+        self.stem = PurePosixPath(member).stem
+        self.suffix = PurePosixPath(member).suffix
+
+    def __eq__(self, other):
+        return (isinstance(other, ArchiveMember)
+                and (self.archive, self.member) == (other.archive, other.member))
+
+    def __hash__(self):
+        return hash((self.archive, self.member))
+
+    def __str__(self):
+        return f"{self.archive}!{self.member}"
+
+    def __repr__(self):
+        return f"ArchiveMember({str(self.archive)!r}, {self.member!r})"
+
+    def resolve(self):
+        return ArchiveMember(self.archive.resolve(), self.member, self.size)
+
+    def stat(self):
+        # mtime theo file nén: file nén thay đổi thì mọi file bên trong được coi là đã đổi
+        stat = self.archive.stat()
+        size = stat.st_size if self.size is None else self.size
+        return SimpleNamespace(st_size=size, st_mtime_ns=stat.st_mtime_ns)
+
+    @contextmanager
+    def open(self):
+        # Luồng byte đã giải nén của file bên trong
+        if self.archive.suffix.lower() == ".zip":
+            with zipfile.ZipFile(self.archive) as archive, archive.open(self.member) as stream:
+                yield stream
+        else:
+            with gzip.open(self.archive, "rb") as stream:
+                yield stream
+
+def archive_members(archive: Path) -> list:
+    """Liệt kê các file .csv trong một file .zip, hoặc file .csv.gz."""
+    archive = Path(archive)
+    if archive.suffix.lower() == ".gz":
+        # Chỉ nhận file .csv.gz; tên file bên trong là tên file nén bỏ đuôi .gz
+        if not archive.stem.lower().endswith(".csv"):
+            return []
+        return [ArchiveMember(archive, archive.stem)]
+    with zipfile.ZipFile(archive) as zf:
+        return [
+            ArchiveMember(archive, info.filename, info.compress_size)
+            for info in zf.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(".csv")
+            and not info.filename.startswith("__MACOSX/")
+        ]
+
+@contextmanager
+def open_csv(file_path):
+    """Trả về đối tượng đưa được cho pd.read_csv: chính Path, hoặc luồng
+    đã giải nén của ArchiveMember."""
+    if isinstance(file_path, ArchiveMember):
+        with file_path.open() as stream:
+            yield stream
+    else:
+        yield file_path
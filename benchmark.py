@@ -0,0 +1,197 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import funtion_process as fp
+
+# Tên cột theo đúng định dạng file log thật: cột thời gian đứng đầu,
+# các kênh có dạng "<prefix>\<thiết bị>"
+TIME_HEADER = "Time\\ms"
+CHANNEL_SUFFIX = "\\ECU:1"
+
+def generate_logs(folder: Path, files=4, rows=100_000, columns=50, seed=0) -> list:
+    """Tạo các file CSV giả lập log xe để đo hiệu năng.
+
+    Mỗi file có cột thời gian (ms, tăng dần), các kênh của SIGNAL_MAP và thêm
+    các kênh phụ cho đủ columns cột.
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = []
+    for index in range(files):
+        data = {TIME_HEADER: np.arange(rows, dtype=np.int64)}
+        data["vNE" + CHANNEL_SUFFIX] = 800 + 50 * np.sin(np.arange(rows) / 5000) + rng.normal(0, 5, rows)
+        data["bvNSET0" + CHANNEL_SUFFIX] = rng.integers(0, 3000, rows)
+        data["vQLDAC" + CHANNEL_SUFFIX] = rng.normal(0, 1, rows).round(3)
+        data["vSWMONT" + CHANNEL_SUFFIX] = (rng.random(rows) > 0.999).cumsum() % 2
+        for extra in range(max(columns - len(data), 0)):
+            data[f"ch{extra}" + CHANNEL_SUFFIX] = rng.normal(0, 1, rows).round(4)
+        path = folder / f"bench_{index:03d}.csv"
+        pd.DataFrame(data).to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+def peak_rss_mb():
+    # Bộ nhớ RSS lớn nhất của tiến trình hiện tại (MB), None nếu không đo được
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về byte
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def load_windows(files, signals, start, end, precision="float64") -> list:
+    prefixes = fp.parse_signals(signals)
+    return [fp.read_signal_window(Path(path), prefixes, start, end, precision=precision) for path in files]
+
+def stage_read(files, signals, start, end, output_dir, precision="float64"):
+    prefixes = fp.parse_signals(signals)
+    began = time.perf_counter()
+    rows = sum(len(fp.read_signal_window(Path(path), prefixes, start, end, precision=precision)[0]) for path in files)
+    return time.perf_counter() - began, rows, 0
+
+def stage_output_csv(files, signals, start, end, output_dir, output_format="csv", precision="float64"):
+    windows = load_windows(files, signals, start, end, precision)
+    began = time.perf_counter()
+    outputs = [
+        fp.create_output_csv(Path(path), df, Path(output_dir), output_format)
+        for path, (df, time_col, signal_cols) in zip(files, windows)
+    ]
+    seconds = time.perf_counter() - began
+    written = sum(output.stat().st_size for output in outputs)
+    return seconds, sum(len(df) for df, _, _ in windows), written
+
+def stage_plot(files, signals, start, end, output_dir, precision="float64"):
+    windows = load_windows(files, signals, start, end, precision)
+    began = time.perf_counter()
+    written = 0
+    for path, (df, time_col, signal_cols) in zip(files, windows):
+        written += len(fp.create_plot(df, time_col, signal_cols, Path(path).stem))
+    return time.perf_counter() - began, sum(len(df) for df, _, _ in windows), written
+
+def stage_summary(files, signals, start, end, output_dir, precision="float64"):
+    windows = load_windows(files, signals, start, end, precision)
+    results = {
+        Path(path): {"plot": fp.create_plot(df, time_col, signal_cols, Path(path).stem)}
+        for path, (df, time_col, signal_cols) in zip(files, windows)
+    }
+    began = time.perf_counter()
+    fp.create_summary_excel(results, start, end, ", ".join(fp.parse_signals(signals)), Path(output_dir))
+    seconds = time.perf_counter() - began
+    return seconds, 0, (Path(output_dir) / "summary.xlsx").stat().st_size
+
+def stage_pipeline(files, signals, start, end, output_dir, workers=1, output_format="csv", precision="float64"):
+    input_dir = Path(files[0]).parent
+    began = time.perf_counter()
+    fp.run_processing(input_dir, output_dir, signals, str(start), str(end), workers=workers, use_cache=False,
+                      output_format=output_format, precision=precision)
+    seconds = time.perf_counter() - began
+    written = sum(path.stat().st_size for path in (Path(output_dir) / "output").iterdir())
+    return seconds, 0, written
+
+STAGES = {
+    "read": stage_read,
+    "output_csv": stage_output_csv,
+    "plot": stage_plot,
+    "summary": stage_summary,
+    "pipeline": stage_pipeline,
+}
+
+def run_stage(name, files, signals, start, end, output_dir, options):
+    # Chạy trong tiến trình con riêng để đo được bộ nhớ đỉnh của từng bước
+    seconds, rows, bytes_written = STAGES[name](files, signals, start, end, output_dir, **options)
+    return {"seconds": seconds, "rows": rows, "bytes_written": bytes_written, "peak_rss_mb": peak_rss_mb()}
+
+def run_benchmark(files, signals, start, end, stages=None, workers=1, output_format="csv", precision="float64") -> dict:
+    """Đo thời gian, bộ nhớ đỉnh và thông lượng của từng bước xử lý."""
+    files = [str(path) for path in files]
+    bytes_in = sum(Path(path).stat().st_size for path in files)
+    results = {}
+    for name in stages or STAGES:
+        options = {"precision": precision}
+        if name == "pipeline":
+            options["workers"] = workers
+        if name in ("output_csv", "pipeline"):
+            options["output_format"] = output_format
+        with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as output_dir:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                stage = executor.submit(run_stage, name, files, signals, start, end, output_dir, options).result()
+        seconds = stage["seconds"]
+        stage["files_per_s"] = len(files) / seconds if seconds else None
+        stage["input_mb_per_s"] = bytes_in / (1024 * 1024) / seconds if seconds else None
+        stage["rows_per_s"] = stage["rows"] / seconds if seconds and stage["rows"] else None
+        results[name] = stage
+        print(f"⏱ {name}: {seconds:.3f} s, peak RSS {stage['peak_rss_mb'] or 0:.0f} MB")
+    return {"input_bytes": bytes_in, "files": len(files), "stages": results}
+
+def append_results(results_path: Path, run: dict):
+    # File kết quả là một danh sách các lần chạy để so sánh với nhau
+    runs = []
+    if results_path.exists():
+        with open(results_path, encoding="utf-8") as f:
+            runs = json.load(f)
+    runs.append(run)
+    with open(results_path, "w", encoding="utf-8") as f:
+        json.dump(runs, f, indent=2, ensure_ascii=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Đo hiệu năng quy trình xử lý log.")
+    parser.add_argument("--files", type=int, default=4, help="số file log giả lập")
+    parser.add_argument("--rows", type=int, default=200_000, help="số dòng mỗi file")
+    parser.add_argument("--columns", type=int, default=100, help="số cột mỗi file")
+    parser.add_argument("--signal", action="append", help="tín hiệu trong SIGNAL_MAP (lặp lại để chọn nhiều)")
+    parser.add_argument("--start", type=int, default=0)
+    parser.add_argument("--end", type=int, help="mặc định: một nửa số dòng")
+    parser.add_argument("--stage", action="append", choices=list(STAGES), help="chỉ chạy bước này (lặp lại được)")
+    parser.add_argument("--workers", type=int, default=1, help="số tiến trình cho bước pipeline")
+    parser.add_argument("--format", choices=list(fp.OUTPUT_FORMATS), default="csv",
+                        help="định dạng output cho bước output_csv và pipeline")
+    parser.add_argument("--precision", choices=fp.PRECISIONS, default="float64",
+                        help="độ chính xác các cột tín hiệu (so sánh bộ nhớ đỉnh giữa hai lần chạy)")
+    parser.add_argument("--data-dir", type=Path, help="thư mục chứa log giả lập (dùng lại nếu đã có)")
+    parser.add_argument("--results", type=Path, default=Path("bench_results.json"), help="file JSON lưu kết quả")
+    parser.add_argument("--label", default="", help="ghi chú cho lần chạy")
+    args = parser.parse_args(argv)
+
+    signals = args.signal or ["Actual Speed"]
+    end = args.end if args.end is not None else args.rows // 2
+    with tempfile.TemporaryDirectory(prefix="bench_data_") as tmp:
+        data_dir = args.data_dir or Path(tmp)
+        files = sorted(data_dir.glob("bench_*.csv"))[:args.files]
+        if len(files) < args.files:
+            print(f"🛠 Đang tạo {args.files} file log giả lập ({args.rows} dòng x {args.columns} cột)...")
+            files = generate_logs(data_dir, args.files, args.rows, args.columns)
+        measured = run_benchmark(files, signals, args.start, end, args.stage, args.workers, args.format,
+                                 args.precision)
+
+    run = {
+        "label": args.label,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "params": {
+            "files": args.files, "rows": args.rows, "columns": args.columns, "signals": signals,
+            "start": args.start, "end": end, "workers": args.workers, "format": args.format,
+            "precision": args.precision,
+        },
+        **measured,
+    }
+    append_results(args.results, run)
+    print(f"📄 Đã ghi kết quả vào: {args.results}")
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,42 @@ print("path:", str(os.getcwd()))
 
 distpath ="--distpath=" + r"D:\Code_learn\Build_exe"
 workpath = "--workpath=" + r"D:\Code_learn\Build_exe\tempo"
+
+# Các module không dùng tới nhưng PyInstaller vẫn kéo vào (qua pandas,
+# matplotlib, PyQt5): bỏ đi để bản build nhỏ hơn và khởi động đọc ít file hơn.
+# pyarrow được giữ lại cho định dạng output parquet/feather.
+EXCLUDED_MODULES = [
+    "tkinter",
+    "_tkinter",
+    "matplotlib.backends.backend_tkagg",
+    "matplotlib.backends.backend_qtagg",
+    "matplotlib.backends.backend_qt5agg",
+    "matplotlib.backends.backend_webagg",
+    "matplotlib.backends.backend_pdf",
+    "matplotlib.backends.backend_svg",
+    "matplotlib.backends.backend_pgf",
+    "matplotlib.backends.backend_ps",
+    "PyQt5.QtWebEngine",
+    "PyQt5.QtWebEngineCore",
+    "PyQt5.QtWebEngineWidgets",
+    "PyQt5.QtQml",
+    "PyQt5.QtQuick",
+    "PyQt5.QtMultimedia",
+    "PyQt5.QtNetwork",
+    "PyQt5.QtSql",
+    "PyQt5.QtBluetooth",
+    "PyQt5.QtDesigner",
+    "IPython",
+    "jupyter_client",
+    "notebook",
+    "scipy",
+    "sqlalchemy",
+    "tables",
+    "pytest",
+    "pandas.tests",
+    "numpy.tests",
+]
+
 PyInstaller.__main__.run([
     "--onedir",
     # "--onefile",
@@ -14,6 +50,7 @@ PyInstaller.__main__.run([
     "--windowed",
     distpath,
     workpath,
+    *[f"--exclude-module={module}" for module in EXCLUDED_MODULES],
     "--clean",
     "-y"
-])
\ No newline at end of file
+])
@@ -0,0 +1,114 @@
+import threading
+from io import BytesIO
+from itertools import cycle
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+class ChartRenderer:
+    """Vẽ biểu đồ tín hiệu ra PNG bằng Agg, dùng lại figure giữa các file.
+
+    Không dùng pyplot (trạng thái toàn cục) nên an toàn khi mỗi luồng/tiến
+    trình có renderer riêng (xem thread_renderer). Chỉ giữ một figure: các
+    file liên tiếp có cùng số biểu đồ con dùng lại figure, các trục, đường vẽ
+    và font, mỗi file chỉ cập nhật dữ liệu, nhãn, tiêu đề và giới hạn trục;
+    số biểu đồ con khác thì figure cũ được bỏ đi. Bố cục (tight_layout) chỉ
+    được tính lại khi độ dài nhãn trục y thay đổi (lề trái phụ thuộc vào nhãn
+    này), không tính lại cho từng file.
+
+    Bộ đệm ảnh Agg ở độ phân giải lưu file rất lớn (hàng trăm MB) và các
+    Text của figure giữ tham chiếu tới renderer của lần vẽ cuối. Sau mỗi lần
+    savefig, figure được vẽ lại (không có dữ liệu) ở dpi gốc để bộ đệm lớn
+    được giải phóng ngay thay vì bị giữ suốt đời luồng/tiến trình.
+    """
+
+    def __init__(self, figsize, dpi, colors):
+        self.figsize = figsize
+        self.dpi = dpi
+        self.colors = colors
+        self.chart = None
+
+    def figure(self, n_series):
+        if self.chart is None or len(self.chart["axes"]) != n_series:
+            fig = Figure(figsize=self.figsize)
+            FigureCanvasAgg(fig)
+            axes = fig.subplots(n_series, 1, sharex=True, squeeze=False)[:, 0]
+            lines = [ax.plot([], [], color=color, linewidth=1.5)[0]
+                     for ax, color in zip(axes, cycle(self.colors))]
+            self.chart = {"fig": fig, "axes": axes, "lines": lines, "layout": None}
+        return self.chart
+
+    def render(self, series, title) -> bytes:
+        """series: danh sách (x, y, nhãn), mỗi phần tử một biểu đồ con; y phải là số.
+
+        Nếu vẽ lỗi, figure bị bỏ đi (trục có thể đã đổi đơn vị hoặc còn dữ liệu
+        dở dang) để lỗi của một file không làm hỏng các file vẽ sau.
+        """
+        try:
+            chart = self.figure(len(series))
+            fig, axes = chart["fig"], chart["axes"]
+            for ax, line, (x, y, label) in zip(axes, chart["lines"], series):
+                line.set_data(x, y)
+                line.set_label(label)
+                ax.relim()
+                ax.autoscale_view()
+            axes[0].set_title(title, fontsize=11)
+            layout = tuple(self.ytick_width(ax) for ax in axes)
+            if layout != chart["layout"]:
+                fig.tight_layout()
+                chart["layout"] = layout
+            for ax in axes:
+                ax.legend(fontsize=9, loc="best")
+            buffer = BytesIO()
+            fig.savefig(buffer, format="png", dpi=self.dpi)
+            self.release(chart)
+        except Exception:
+            self.chart = None
+            raise
+        return buffer.getvalue()
+
+    @staticmethod
+    def release(chart):
+        # Bỏ dữ liệu của file vừa vẽ rồi vẽ lại ở dpi gốc (nhanh): renderer cỡ
+        # nhỏ thay chỗ renderer của savefig trong canvas và trong các Text
+        for line in chart["lines"]:
+            line.set_data([], [])
+        chart["fig"].canvas.draw()
+
+    @staticmethod
+    def ytick_width(ax) -> tuple:
+        # Độ dài nhãn trục y dài nhất và phần offset (vd "1e6"), không cần vẽ figure
+        formatter = ax.yaxis.get_major_formatter()
+        low, high = ax.get_ylim()
+        ticks = [tick for tick in ax.yaxis.get_major_locator()() if low <= tick <= high]
+        labels = formatter.format_ticks(ticks)
+        return max((len(label) for label in labels), default=0), formatter.get_offset()
+
+local = threading.local()
+
+def thread_renderer(figsize, dpi, colors) -> ChartRenderer:
+    # Mỗi luồng (và mỗi tiến trình con) một renderer, tạo khi dùng lần đầu
+    renderer = getattr(local, "renderer", None)
+    if renderer is None or (renderer.figsize, renderer.dpi, renderer.colors) != (figsize, dpi, colors):
+        renderer = local.renderer = ChartRenderer(figsize, dpi, colors)
+    return renderer
+
+def render_overlay(series, title, figsize, dpi) -> bytes:
+    """Vẽ nhiều đường (x, y, nhãn) trên cùng một biểu đồ, trả về PNG.
+
+    Chỉ vẽ một lần cho mỗi lần so sánh nên tạo figure mới mỗi lần gọi.
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    for x, y, label in series:
+        ax.plot(x, y, linewidth=1.0, label=label)
+    ax.set_title(title, fontsize=11)
+    fig.tight_layout()
+    ax.legend(fontsize=7, loc="best")
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi)
+    # Bỏ các artist (giữ tham chiếu tới renderer) và canvas để bộ đệm ảnh được
+    # giải phóng ngay, không phải chờ bộ gom rác xử lý vòng tham chiếu của figure
+    fig.clear()
+    FigureCanvasAgg(fig)
+    return buffer.getvalue()
@@ -0,0 +1,222 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from funtion_process import OUTPUT_FORMATS, PRECISIONS, SIGNAL_MAP, run_processing, watch_folder
+from comparison import run_comparison
+
+# Mã thoát của chương trình
+EXIT_OK = 0
+EXIT_JOB_FAILED = 1       # có job lỗi (input/output/tham số không hợp lệ...)
+EXIT_USAGE = 2            # sai tham số dòng lệnh hoặc file job không hợp lệ
+EXIT_FILES_FAILED = 3     # mọi job chạy xong nhưng có file bị lỗi khi xử lý
+EXIT_INTERRUPTED = 130    # bị dừng bằng Ctrl+C
+
+# Các khóa tùy chọn được phép trong một job (ánh xạ sang tham số của run_processing)
+JOB_OPTIONS = {
+    "decimate": "decimate",
+    "use_cache": "use_cache",
+    "cache_dir": "cache_dir",
+    "files_per_sheet": "files_per_sheet",
+    "report": "report_stages",
+    "profile": "profile",
+    "incremental": "incremental",
+    "thresholds": "thresholds",
+    "format": "output_format",
+    "memory_budget_mb": "memory_budget_mb",
+    "precision": "precision",
+}
+JOB_KEYS = {"name", "input", "output", "signals", "start", "end", *JOB_OPTIONS}
+
+class JobFileError(ValueError):
+    pass
+
+def load_jobs(job_file: Path) -> tuple:
+    """Đọc file job JSON, trả về (defaults, danh sách job đã gộp defaults).
+
+    File có dạng {"defaults": {...}, "jobs": [{...}, ...]} hoặc chỉ là danh
+    sách job. Mỗi job cần input, output, signals, start, end.
+    """
+    try:
+        with open(job_file, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as error:
+        raise JobFileError(f"❌ Không đọc được file job {job_file}: {error}")
+
+    if isinstance(data, list):
+        data = {"jobs": data}
+    if not isinstance(data, dict) or not isinstance(data.get("jobs"), list):
+        raise JobFileError("❌ File job phải có danh sách \"jobs\".")
+    defaults = data.get("defaults", {})
+    if not isinstance(defaults, dict):
+        raise JobFileError("❌ \"defaults\" phải là một object.")
+    workers = defaults.get("workers")
+    if workers is not None and (isinstance(workers, bool) or not isinstance(workers, int)):
+        raise JobFileError("❌ \"workers\" trong defaults phải là số nguyên.")
+
+    jobs = []
+    for index, job in enumerate(data["jobs"], start=1):
+        if not isinstance(job, dict):
+            raise JobFileError(f"❌ Job {index} không hợp lệ.")
+        job = {**{key: value for key, value in defaults.items() if key != "workers"}, **job}
+        unknown = set(job) - JOB_KEYS
+        if unknown:
+            raise JobFileError(f"❌ Job {index}: khóa không hợp lệ {', '.join(sorted(unknown))}.")
+        missing = [key for key in ("input", "output", "signals", "start", "end") if key not in job]
+        if missing:
+            raise JobFileError(f"❌ Job {index}: thiếu {', '.join(missing)}.")
+        job.setdefault("name", f"job {index}")
+        jobs.append(job)
+    return defaults, jobs
+
+def run_job(job: dict, executor=None, workers=1) -> int:
+    options = {JOB_OPTIONS[key]: value for key, value in job.items() if key in JOB_OPTIONS}
+    print(f"▶ {job['name']}: {job['input']} -> {job['output']}")
+    try:
+        outcome = run_processing(
+            job["input"], job["output"], job["signals"], str(job["start"]), str(job["end"]),
+            workers=workers, executor=executor, **options
+        )
+    except Exception as error:
+        print(error)
+        return EXIT_JOB_FAILED
+    if outcome["failed"]:
+        print(f"⚠ {job['name']}: {len(outcome['failed'])} file lỗi: {', '.join(outcome['failed'])}")
+        return EXIT_FILES_FAILED
+    print(f"✅ {job['name']}: đã xử lý {outcome['processed']} file.")
+    return EXIT_OK
+
+def run_jobs(jobs, workers=1) -> int:
+    """Chạy lần lượt các job, dùng chung một pool tiến trình nếu workers > 1."""
+    codes = []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            codes = [run_job(job, executor) for job in jobs]
+    else:
+        codes = [run_job(job) for job in jobs]
+    # Lỗi cả job nặng hơn lỗi từng file
+    if EXIT_JOB_FAILED in codes:
+        return EXIT_JOB_FAILED
+    if EXIT_FILES_FAILED in codes:
+        return EXIT_FILES_FAILED
+    return EXIT_OK
+
+def add_run_options(parser):
+    parser.add_argument("--input", required=True, help="thư mục chứa file .csv")
+    parser.add_argument("--output", required=True, help="thư mục output")
+    parser.add_argument("--signal", action="append", required=True, choices=list(SIGNAL_MAP),
+                        help="tín hiệu cần lấy (lặp lại để chọn nhiều)")
+    parser.add_argument("--start", required=True, help="Start Time")
+    parser.add_argument("--end", required=True, help="End Time")
+    parser.add_argument("--workers", type=int, default=1, help="số tiến trình xử lý song song")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float64",
+                        help="float32: đọc các cột tín hiệu dạng float32 (giảm bộ nhớ bước đọc)")
+    parser.add_argument("--memory-budget", type=float, metavar="MB",
+                        help="giới hạn tổng kích thước các file xử lý cùng lúc (MB)")
+    parser.add_argument("--no-decimate", action="store_true", help="vẽ toàn bộ điểm, không giảm điểm")
+    parser.add_argument("--no-cache", action="store_true", help="không dùng cache cột đã parse")
+    parser.add_argument("--cache-dir", help="thư mục cache (mặc định: thư mục cache của người dùng)")
+    parser.add_argument("--format", choices=list(OUTPUT_FORMATS), default="csv",
+                        help="định dạng file output của từng file log (mặc định: csv)")
+    parser.add_argument("--files-per-sheet", type=int, help="số file tối đa trên một sheet summary")
+    parser.add_argument("--report", action="store_true", help="ghi run_report.json/csv")
+    parser.add_argument("--profile", action="store_true", help="chạy dưới cProfile (xử lý tuần tự trong một tiến trình)")
+    parser.add_argument("--threshold", action="append", type=parse_threshold, default=[], metavar="PREFIX=VALUE",
+                        help="ngưỡng để đếm số lần cắt ngưỡng của tín hiệu (lặp lại được)")
+
+def parse_threshold(text):
+    prefix, sep, value = text.partition("=")
+    try:
+        if not sep or not prefix:
+            raise ValueError
+        return prefix.strip(), float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ngưỡng không hợp lệ: {text} (dạng PREFIX=VALUE, ví dụ vNE=1500)")
+
+def job_from_args(args) -> dict:
+    job = {
+        "name": "run", "input": args.input, "output": args.output, "signals": args.signal,
+        "start": args.start, "end": args.end,
+        "decimate": not args.no_decimate, "use_cache": not args.no_cache, "cache_dir": args.cache_dir,
+        "report": args.report, "profile": args.profile, "thresholds": dict(args.threshold),
+        "format": args.format, "memory_budget_mb": args.memory_budget, "precision": args.precision,
+    }
+    if args.files_per_sheet is not None:
+        job["files_per_sheet"] = args.files_per_sheet
+    return job
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Xử lý log CSV không cần giao diện.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="xử lý một thư mục input")
+    add_run_options(run_parser)
+    run_parser.add_argument("--incremental", action="store_true", help="chỉ xử lý file mới hoặc đã thay đổi")
+
+    watch_parser = commands.add_parser("watch", help="theo dõi thư mục input và xử lý file mới")
+    add_run_options(watch_parser)
+    watch_parser.add_argument("--interval", type=float, default=5, help="số giây giữa hai lần kiểm tra")
+
+    compare_parser = commands.add_parser("compare", help="so sánh một tín hiệu giữa các file trên lưới thời gian chung")
+    compare_parser.add_argument("--input", required=True, help="thư mục chứa file .csv")
+    compare_parser.add_argument("--output", required=True, help="thư mục output")
+    compare_parser.add_argument("--signal", action="append", required=True, choices=list(SIGNAL_MAP),
+                                help="tín hiệu cần so sánh (lặp lại để chọn nhiều)")
+    compare_parser.add_argument("--start", required=True, help="Start Time")
+    compare_parser.add_argument("--end", required=True, help="End Time")
+    compare_parser.add_argument("--step", type=float, help="bước lưới thời gian (mặc định: theo bước lấy mẫu)")
+    compare_parser.add_argument("--reference", help="tên file tham chiếu (không có đuôi), mặc định file đầu tiên")
+    compare_parser.add_argument("--no-cache", action="store_true", help="không dùng cache cột đã parse")
+    compare_parser.add_argument("--cache-dir", help="thư mục cache (mặc định: thư mục cache của người dùng)")
+
+    jobs_parser = commands.add_parser("jobs", help="chạy các job trong file JSON")
+    jobs_parser.add_argument("job_file", type=Path)
+    jobs_parser.add_argument("--workers", type=int, help="số tiến trình dùng chung cho mọi job")
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == "jobs":
+            try:
+                defaults, jobs = load_jobs(args.job_file)
+            except JobFileError as error:
+                print(error)
+                return EXIT_USAGE
+            workers = args.workers or defaults.get("workers", 1)
+            if workers is None or workers <= 0:
+                workers = os.cpu_count() or 1
+            return run_jobs(jobs, workers)
+
+        if args.command == "compare":
+            try:
+                outputs = run_comparison(args.input, args.output, args.signal, args.start, args.end, args.step,
+                                         args.reference, not args.no_cache, args.cache_dir)
+            except Exception as error:
+                print(error)
+                return EXIT_JOB_FAILED
+            return EXIT_OK if outputs else EXIT_FILES_FAILED
+
+        job = job_from_args(args)
+        if args.command == "watch":
+            options = {JOB_OPTIONS[key]: value for key, value in job.items() if key in JOB_OPTIONS}
+            try:
+                watch_folder(job["input"], job["output"], job["signals"], job["start"], job["end"],
+                             interval=args.interval, workers=args.workers, **options)
+            except Exception as error:
+                print(error)
+                return EXIT_JOB_FAILED
+            return EXIT_OK
+
+        job["incremental"] = args.incremental
+        return run_jobs([job], args.workers)
+    except KeyboardInterrupt:
+        print("⏹ Đã dừng.")
+        return EXIT_INTERRUPTED
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
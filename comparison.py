@@ -0,0 +1,212 @@
+import csv
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import funtion_process as fp
+from chart_renderer import render_overlay
+from log_cache import LogCache
+
+# Số điểm tối đa của lưới thời gian chung (tránh tạo file so sánh quá lớn)
+COMPARE_MAX_POINTS = 10_000_000
+# Số dòng của lưới xử lý mỗi lần (nội suy, ghi CSV, tính độ lệch)
+COMPARE_CHUNK_ROWS = 200_000
+DEVIATION_FIELDS = ["File", "Points", "Mean diff", "Max abs diff", "RMS diff"]
+
+def spill_window(file_path, signal_key, start, end, spill_dir: Path, cache=None):
+    """Đọc khoảng [start, end] của một tín hiệu, ghi (thời gian, giá trị) ra
+    spill_dir dạng .npy và trả về thông tin của chuỗi; None nếu không có dữ liệu.
+
+    Dữ liệu được sắp theo thời gian và bỏ các giá trị không phải số để nội suy
+    được; bộ nhớ được giải phóng ngay sau khi ghi. Bước lấy mẫu là trung vị
+    các khoảng cách dương giữa hai mốc thời gian liên tiếp (bỏ qua mốc trùng),
+    None nếu mọi mốc thời gian đều trùng nhau.
+    """
+    df, time_col, signal_cols = fp.read_signal_window(file_path, [signal_key], start, end, cache=cache)
+    times = pd.to_numeric(df[time_col], errors="coerce").to_numpy(dtype=np.float64)
+    values = pd.to_numeric(df[signal_cols[0]], errors="coerce").to_numpy(dtype=np.float64)
+    del df
+    valid = ~(np.isnan(times) | np.isnan(values))
+    times, values = times[valid], values[valid]
+    if len(times) < 2:
+        return None
+    if not fp.is_sorted(times):
+        order = np.argsort(times, kind="stable")
+        times, values = times[order], values[order]
+
+    time_path = spill_dir / f"{file_path.stem}_time.npy"
+    value_path = spill_dir / f"{file_path.stem}_value.npy"
+    np.save(time_path, times)
+    np.save(value_path, values)
+    gaps = np.diff(times)
+    gaps = gaps[gaps > 0]
+    return {
+        "file": file_path,
+        "time_col": time_col,
+        "times": time_path,
+        "values": value_path,
+        "first": float(times[0]),
+        "last": float(times[-1]),
+        "step": float(np.median(gaps)) if len(gaps) else None,
+    }
+
+def resample_to_grid(times, values, grid_start, step, out, chunksize=COMPARE_CHUNK_ROWS):
+    """Nội suy tuyến tính (times, values) lên lưới grid_start + step * i, ghi vào out.
+
+    Duyệt lưới theo từng khối; điểm lưới nằm ngoài khoảng có dữ liệu là NaN
+    (không ngoại suy). times phải tăng dần.
+    """
+    for first in range(0, len(out), chunksize):
+        grid = grid_start + step * np.arange(first, min(first + chunksize, len(out)))
+        # Chỉ lấy phần dữ liệu bao quanh khối lưới này
+        lo = max(int(np.searchsorted(times, grid[0], side="right")) - 1, 0)
+        hi = int(np.searchsorted(times, grid[-1], side="left")) + 1
+        block = np.interp(grid, times[lo:hi], values[lo:hi], left=np.nan, right=np.nan)
+        out[first:first + len(grid)] = block
+
+def compare_signal(windows, signal_key, grid_start, step, n_points, output_path: Path, work_dir: Path,
+                   reference_index=0, chunksize=COMPARE_CHUNK_ROWS) -> dict:
+    """Đưa các chuỗi lên lưới chung, ghi CSV dạng bảng rộng, bảng độ lệch so với
+    chuỗi tham chiếu và biểu đồ chồng các chuỗi. Trả về đường dẫn các file."""
+    columns = []
+    for idx, window in enumerate(windows):
+        column = np.lib.format.open_memmap(work_dir / f"grid_{signal_key}_{idx}.npy", mode="w+",
+                                           dtype=np.float64, shape=(n_points,))
+        resample_to_grid(np.load(window["times"], mmap_mode="r"), np.load(window["values"], mmap_mode="r"),
+                         grid_start, step, column, chunksize)
+        column.flush()
+        columns.append(column)
+
+    names = [window["file"].stem for window in windows]
+    reference = columns[reference_index]
+    count = np.zeros(len(columns), dtype=np.int64)
+    total = np.zeros(len(columns))
+    total_sq = np.zeros(len(columns))
+    max_abs = np.zeros(len(columns))
+    n_buckets = int(fp.PLOT_FIGSIZE[0] * fp.PLOT_DPI)
+    overlay = [([], []) for _ in columns]
+
+    csv_path = output_path / f"comparison_{signal_key}.csv"
+    with open(csv_path, "w", newline="", encoding="utf-8-sig") as f:
+        # Tiêu đề ghi cùng cách với phần dữ liệu: tên có dấu phẩy được đặt trong ngoặc kép
+        pd.DataFrame(columns=[windows[0]["time_col"], *names]).to_csv(f, index=False)
+        for first in range(0, n_points, chunksize):
+            last = min(first + chunksize, n_points)
+            grid = grid_start + step * np.arange(first, last)
+            block = [grid]
+            for idx, column in enumerate(columns):
+                values = np.asarray(column[first:last])
+                block.append(values)
+
+                # Độ lệch so với tham chiếu tại các điểm cả hai đều có dữ liệu
+                diff = values - np.asarray(reference[first:last])
+                diff = diff[~np.isnan(diff)]
+                count[idx] += len(diff)
+                total[idx] += diff.sum()
+                total_sq[idx] += np.dot(diff, diff)
+                if len(diff):
+                    max_abs[idx] = max(max_abs[idx], float(np.abs(diff).max()))
+
+                # Giảm điểm cho biểu đồ theo từng khối, số nhóm tỉ lệ với độ dài khối
+                valid = ~np.isnan(values)
+                x, y = fp.decimate_minmax(grid[valid], values[valid],
+                                          max(int(n_buckets * (last - first) / n_points), 1))
+                overlay[idx][0].append(x)
+                overlay[idx][1].append(y)
+            pd.DataFrame(np.column_stack(block)).to_csv(f, header=False, index=False)
+
+    deviation_path = output_path / f"comparison_{signal_key}_deviation.csv"
+    with open(deviation_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(DEVIATION_FIELDS)
+        for idx, name in enumerate(names):
+            points = int(count[idx])
+            writer.writerow([
+                name, points,
+                total[idx] / points if points else "",
+                max_abs[idx] if points else "",
+                np.sqrt(total_sq[idx] / points) if points else "",
+            ])
+
+    series = [(np.concatenate(xs), np.concatenate(ys), name) for (xs, ys), name in zip(overlay, names)]
+    chart_path = output_path / f"comparison_{signal_key}.png"
+    chart_path.write_bytes(render_overlay(series, f"{signal_key} (tham chiếu: {names[reference_index]})",
+                                          fp.PLOT_FIGSIZE, fp.PLOT_DPI))
+    del columns, reference
+    return {"csv": csv_path, "deviation": deviation_path, "chart": chart_path}
+
+def run_comparison(input_folder, base_output_folder, signal_selection, start_time_str, end_time_str, step=None,
+                   reference=None, use_cache=True, cache_dir=None, chunksize=COMPARE_CHUNK_ROWS) -> dict:
+    """So sánh một tín hiệu giữa các file trên cùng một lưới thời gian.
+
+    Với mỗi tín hiệu đã chọn: đọc khoảng [start, end] của từng file (lần
+    lượt, ghi tạm ra đĩa), tạo lưới thời gian chung trên phần có dữ liệu với
+    bước step (None = trung vị bước lấy mẫu của các file), nội suy mọi file
+    lên lưới rồi ghi vào thư mục output:
+    - comparison_<prefix>.csv: cột thời gian và mỗi file một cột;
+    - comparison_<prefix>_deviation.csv: độ lệch của từng file so với file
+      tham chiếu (reference = tên file không có đuôi, mặc định file đầu tiên);
+    - comparison_<prefix>.png: biểu đồ chồng các file.
+    Tại mỗi thời điểm chỉ giữ trong bộ nhớ dữ liệu của một file (lúc đọc) hoặc
+    một khối lưới (lúc nội suy, ghi CSV, tính độ lệch); các cột trên lưới nằm
+    trên đĩa dạng memory-map nên số file không bị giới hạn bởi bộ nhớ.
+    Trả về {prefix: {"csv", "deviation", "chart"}}.
+    """
+    input_path = Path(input_folder)
+    csv_files = sorted(fp.get_csv_files(input_path), key=lambda file_path: file_path.name)
+    signal_prefixes = fp.parse_signals(signal_selection)
+    start, end = fp.parse_time(start_time_str, end_time_str)
+    if step is not None and step <= 0:
+        raise ValueError("❌ Bước lưới thời gian phải lớn hơn 0.")
+    file_signals = fp.build_header_index(csv_files, signal_prefixes)
+    output_path = fp.ensure_output_folder(Path(base_output_folder))
+    cache = LogCache(cache_dir) if use_cache else None
+
+    outputs = {}
+    with tempfile.TemporaryDirectory(prefix="compare_") as work_dir:
+        work_dir = Path(work_dir)
+        for signal_key in signal_prefixes:
+            spill_dir = work_dir / signal_key
+            spill_dir.mkdir()
+            windows = []
+            for file_path in csv_files:
+                if signal_key not in file_signals.get(file_path, []):
+                    continue
+                try:
+                    window = spill_window(file_path, signal_key, start, end, spill_dir, cache)
+                except Exception as error:
+                    print(f"❌ Lỗi khi xử lý {file_path.name}: {error}")
+                    continue
+                if window is None:
+                    print(f"⚠ {file_path.name}: Không có dữ liệu \"{signal_key}\" trong khoảng thời gian.")
+                    continue
+                windows.append(window)
+            if len(windows) < 2:
+                print(f"⚠ \"{signal_key}\": cần ít nhất 2 file có dữ liệu để so sánh.")
+                continue
+
+            reference_index = 0
+            if reference is not None:
+                stems = [window["file"].stem for window in windows]
+                if reference not in stems:
+                    raise ValueError(f"❌ Không tìm thấy file tham chiếu: {reference}")
+                reference_index = stems.index(reference)
+
+            grid_step = step
+            if grid_step is None:
+                steps = [window["step"] for window in windows if window["step"] is not None]
+                if not steps:
+                    raise ValueError(f"❌ \"{signal_key}\": Không xác định được bước lưới thời gian "
+                                     "(mọi mốc thời gian trùng nhau), hãy nhập bước lưới.")
+                grid_step = float(np.median(steps))
+            grid_start = min(window["first"] for window in windows)
+            grid_end = max(window["last"] for window in windows)
+            n_points = int(np.floor((grid_end - grid_start) / grid_step)) + 1
+            if n_points > COMPARE_MAX_POINTS:
+                raise ValueError(f"❌ Lưới thời gian quá lớn ({n_points} điểm), hãy chọn bước lớn hơn.")
+
+            outputs[signal_key] = compare_signal(windows, signal_key, grid_start, grid_step, n_points,
+                                                 output_path, work_dir, reference_index, chunksize)
+            print(f"📈 Đã so sánh \"{signal_key}\" của {len(windows)} file: "
+                  f"{outputs[signal_key]['csv'].name}, {outputs[signal_key]['chart'].name}")
+    return outputs
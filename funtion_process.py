@@ -1,10 +1,29 @@
+import os
+import tempfile
+import time
+import zipfile
+from functools import lru_cache
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, nullcontext
 from pathlib import Path
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib
+# Chỉ vẽ ra ảnh, không hiển thị: dùng Agg để vẽ được từ luồng/tiến trình phụ
+matplotlib.use("Agg")
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Border, Side, Font
 from openpyxl.utils import get_column_letter
 from openpyxl.drawing.image import Image as XLImage
+from archive_input import ARCHIVE_PATTERNS, ArchiveMember, archive_members, open_csv
+from chart_renderer import thread_renderer
+from instrumentation import RunReport, profiled
+from log_cache import LogCache
+from manifest import Manifest
+from signal_stats import STAT_FIELDS, WindowStats
+from time_index import build_time_index, find_seek_point, is_sorted, window_fraction
 
 SIGNAL_MAP = {
     "Actual Speed": "vNE",
@@ -13,10 +32,81 @@ SIGNAL_MAP = {
     "AC Switch": "vSWMONT"
 }
 
+# Định dạng file output của từng file log -> phần mở rộng
+# csv: giống hệt file cũ (utf-8-sig); csv-fast: số thực ghi 9 chữ số có nghĩa
+# (đủ cho float32, giữ được giá trị rất nhỏ), ghi qua bộ đệm lớn; csv-gz: csv
+# nén gzip; parquet/feather: cần pyarrow
+OUTPUT_FORMATS = {
+    "csv": ".csv",
+    "csv-fast": ".csv",
+    "csv-gz": ".csv.gz",
+    "parquet": ".parquet",
+    "feather": ".feather",
+}
+FAST_CSV_FLOAT_FORMAT = "%.9g"
+FAST_CSV_BUFFER_BYTES = 16 * 1024 * 1024
+# Mức nén thấp: nén nhanh, file vẫn nhỏ hơn nhiều so với csv thường
+CSV_GZIP_LEVEL = 1
+
+# Độ chính xác của các cột tín hiệu: "float64" giữ kiểu pandas tự suy ra (file
+# output giống hệt trước đây), "float32" parse thẳng thành float32 (cột tín
+# hiệu tốn một nửa bộ nhớ, khoảng 7 chữ số có nghĩa). Chỉ giảm bộ nhớ của bước
+# đọc; bộ nhớ đỉnh của cả quy trình do bước vẽ biểu đồ quyết định nên gần như
+# không đổi. Cột thời gian luôn giữ nguyên kiểu.
+PRECISIONS = ("float64", "float32")
+
+# Số dòng đọc mỗi lần khi parse file log theo từng khối
+READ_CHUNK_ROWS = 200_000
+
+# Khoảng thời gian chiếm ít hơn tỉ lệ này của file thì đọc thẳng vùng đó
+# nhờ index vị trí byte, thay vì parse cả file để lưu vào cache
+SEEK_WINDOW_FRACTION = 0.25
+
+# Kích thước và độ phân giải ảnh biểu đồ
+PLOT_FIGSIZE = (8, 5)
+PLOT_DPI = 800
+# Màu các đường khi vẽ nhiều tín hiệu (tín hiệu đầu tiên giữ màu xanh lá)
+PLOT_COLORS = ["green", "tab:blue", "tab:red", "tab:orange"]
+
+# Khoảng thời gian (giây) giữa hai lần kiểm tra thư mục ở chế độ theo dõi
+WATCH_INTERVAL = 5
+
+# Bố cục summary.xlsx: mỗi file một khối 10 cột, khung kéo tới dòng 37,
+# ảnh đặt từ dòng 6. Quá SUMMARY_FILES_PER_SHEET file thì sang sheet mới.
+SUMMARY_BLOCK_COLS = 10
+SUMMARY_BLOCK_ROWS = 37
+SUMMARY_IMAGE_ROW = 6
+SUMMARY_IMAGE_SIZE = (700, 680)
+SUMMARY_FILES_PER_SHEET = 50
+# Tiêu đề cột của sheet thống kê, theo thứ tự STAT_FIELDS
+STATS_HEADERS = ["Rows", "Min", "Max", "Mean", "RMS", "Time at max", "Threshold", "Crossings",
+                 "On edges", "Off edges", "On time", "Off time"]
+
 def get_csv_files(input_path: Path) -> list:
+    """Tìm các file .csv trong thư mục input, kể cả file .csv bên trong các
+    file .zip và file .csv.gz (trả về ArchiveMember, đọc mà không giải nén
+    ra đĩa).
+
+    File output được đặt tên theo tên file CSV nên file trùng tên với một
+    file đã tìm thấy trước đó bị bỏ qua kèm cảnh báo.
+    """
     if not input_path.is_dir():
         raise FileNotFoundError(f"❌ Thư mục input không tồn tại: {input_path}")
     csv_files = list(input_path.glob("*.csv"))
+    stems = {file_path.stem for file_path in csv_files}
+    for pattern in ARCHIVE_PATTERNS:
+        for archive in sorted(input_path.glob(pattern)):
+            try:
+                members = archive_members(archive)
+            except (OSError, zipfile.BadZipFile) as error:
+                print(f"❌ Lỗi khi đọc {archive.name}: {error}")
+                continue
+            for member in members:
+                if member.stem in stems:
+                    print(f"⚠ Bỏ qua {member}: trùng tên với một file .csv khác.")
+                    continue
+                stems.add(member.stem)
+                csv_files.append(member)
     if not csv_files:
         raise FileNotFoundError("⚠ Không tìm thấy file .csv nào trong thư mục input.")
     return csv_files
@@ -57,94 +147,693 @@ def parse_time(start_str, end_str):
             raise ValueError("❌ Giá trị thời gian phải là số nguyên hợp lệ.")
         raise
 
-def find_column(df, signal_key):
-    for col in df.columns:
-        base = col.split("\\")[0].strip()
-        if base == signal_key:
-            return col
-    raise ValueError(f"⚠ Không tìm thấy cột có prefix \"{signal_key}\".")
-
-def create_plot(df, time_col, value_col, filename_stem: str, output_dir: Path) -> Path:
-    plt.figure(figsize=(8, 5))
-    plt.plot(df[time_col], df[value_col], color="green", linewidth=1.5, label=value_col)
-    plt.title(filename_stem, fontsize=11)
-    # plt.grid(True, which="both", linestyle="--", linewidth=0.5)
-    plt.tight_layout()
-    plt.legend(fontsize=9, loc="best")
-    plot_path = output_dir / f"{filename_stem}.png"
-    plt.savefig(plot_path, dpi=800)
-    plt.close()
-    return plot_path
-
-def create_output_csv(file_path, df_filtered, output_folder: Path):
-    output_file = output_folder / f"{file_path.stem}.csv"
-    df_filtered.to_csv(output_file, index=False, encoding="utf-8-sig")
-    print(f"✅ Đã tạo file: {output_file.name}")
+def parse_signals(signal_selection) -> list:
+    # Nhận một tên tín hiệu hoặc danh sách tên, trả về danh sách prefix tương ứng
+    if isinstance(signal_selection, str):
+        signal_selection = [signal_selection]
+    signal_names = list(dict.fromkeys(signal_selection))
+    if not signal_names or any(name not in SIGNAL_MAP for name in signal_names):
+        raise ValueError("❌ Tín hiệu không hợp lệ.")
+    return [SIGNAL_MAP[name] for name in signal_names]
+
+@lru_cache(maxsize=1024)
+def column_prefix_map(columns: tuple) -> dict:
+    # prefix tín hiệu (phần trước dấu "\\") -> cột đầu tiên có prefix đó
+    prefix_map = {}
+    for col in columns:
+        prefix_map.setdefault(col.split("\\")[0].strip(), col)
+    return prefix_map
+
+def find_column(columns, signal_key):
+    # columns là danh sách tên cột hoặc một DataFrame
+    columns = tuple(getattr(columns, "columns", columns))
+    col = column_prefix_map(columns).get(signal_key)
+    if col is None:
+        raise ValueError(f"⚠ Không tìm thấy cột có prefix \"{signal_key}\".")
+    return col
 
-def cleanup_png_files(folder: Path):
-    png_files = list(folder.glob("*.png"))
-    for file in png_files:
+@lru_cache(maxsize=1024)
+def cached_header(file_path, size, mtime_ns) -> tuple:
+    with open_csv(file_path) as source:
+        return tuple(pd.read_csv(source, nrows=0).columns)
+
+def read_header(file_path: Path) -> list:
+    # Chỉ đọc dòng tiêu đề; kết quả được nhớ theo (đường dẫn, kích thước, mtime)
+    stat = file_path.stat()
+    return list(cached_header(file_path, stat.st_size, stat.st_mtime_ns))
+
+def build_header_index(csv_files, signal_prefixes) -> dict:
+    """Bước kiểm tra trước: chỉ đọc dòng tiêu đề của từng file.
+
+    Trả về {file: [prefix có trong file]}. File không có tín hiệu nào (hoặc
+    không đọc được tiêu đề) bị bỏ qua và được báo ngay, trước khi đọc dữ liệu.
+    """
+    file_signals = {}
+    for file_path in csv_files:
         try:
-            file.unlink()
-            print(f"🧹 Đã xóa ảnh: {file.name}")
+            prefix_map = column_prefix_map(tuple(read_header(file_path)))
         except Exception as error:
-            print(f"⚠ Không thể xóa {file.name}: {error}")
+            print(f"❌ Lỗi khi xử lý {file_path.name}: {error}")
+            continue
+        found = [prefix for prefix in signal_prefixes if prefix in prefix_map]
+        if not found:
+            prefixes = ", ".join(f"\"{prefix}\"" for prefix in signal_prefixes)
+            print(f"⚠ Bỏ qua {file_path.name}: Không tìm thấy cột có prefix {prefixes}.")
+            continue
+        for prefix in signal_prefixes:
+            if prefix not in found:
+                print(f"⚠ {file_path.name}: Không tìm thấy cột có prefix \"{prefix}\".")
+        file_signals[file_path] = found
+    return file_signals
 
-def create_summary_excel(results: dict, start_time, end_time, signal, output_folder: Path):
-    summary_path = output_folder / "summary.xlsx"
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Summary"
-    font_bold = Font(name="Arial", size=11, bold=True)
-    font_regular = Font(name="Arial", size=11)
-    align_center = Alignment(horizontal="center", vertical="center")
-    align_left = Alignment(horizontal="left", vertical="center")
+def read_columns(file_path: Path, positions, chunksize=READ_CHUNK_ROWS) -> dict:
+    # Parse toàn bộ các cột ở vị trí positions, trả về {vị trí: mảng numpy}
+    with open_csv(file_path) as source:
+        df = pd.concat(pd.read_csv(source, usecols=positions, chunksize=chunksize))
+    return {pos: df.iloc[:, i].to_numpy() for i, pos in enumerate(sorted(positions))}
+
+def check_precision(precision):
+    if precision not in PRECISIONS:
+        raise ValueError(f"❌ Độ chính xác không hợp lệ: {precision}.")
+
+def signal_dtypes(signal_cols, precision="float64", known=None) -> dict:
+    # Kế hoạch kiểu dữ liệu cho các cột tín hiệu khi parse; {} = để pandas tự suy ra.
+    # known: kiểu trên cả file đã biết; cột không phải số (vd có ô chữ) giữ nguyên
+    if precision == "float32":
+        known = known or {}
+        return {col: np.float32 for col in signal_cols if col not in known or known[col].kind in "iuf"}
+    return {}
+
+def apply_precision(df, signal_cols, precision="float64"):
+    """float32: đổi các cột tín hiệu chưa là float32 sang float32 nếu mọi ô
+    trong khoảng đã đọc là số (hoặc trống); cột còn ô chữ giữ nguyên.
+
+    Chỉ dựa vào các dòng trong khoảng nên kết quả không phụ thuộc vào cách đọc
+    (cache, nhảy giữa file hay đọc từng khối và dừng sớm).
+    """
+    if precision != "float32":
+        return df
+    converted = {}
+    for col in signal_cols:
+        values = df[col]
+        if values.dtype == np.float32 or values.dtype.kind == "b":
+            continue
+        if values.dtype.kind not in "iuf":
+            numeric = pd.to_numeric(values, errors="coerce")
+            if (numeric.isna() & values.notna()).any():
+                continue
+            values = numeric
+        converted[col] = values.astype(np.float32)
+    return df.assign(**converted) if converted else df
+
+def resolve_signal_columns(names, signal_keys, file_name):
+    """Tìm cột ứng với từng prefix tín hiệu trong danh sách tên cột.
+
+    Prefix nào không có trong file thì bỏ qua kèm cảnh báo; báo lỗi nếu không
+    tìm thấy prefix nào.
+    """
+    signal_cols = []
+    missing = []
+    for signal_key in signal_keys:
+        try:
+            signal_cols.append(find_column(names, signal_key))
+        except ValueError as error:
+            missing.append(error)
+    if not signal_cols:
+        raise missing[0]
+    for error in missing:
+        print(f"⚠ {file_name}: {error}")
+    return signal_cols
+
+def merge_dtype(current, new):
+    # Kiểu chung của một cột qua các khối, như pd.read_csv khi đọc cả file:
+    # số nguyên + số thực -> số thực, khác loại (vd số + chữ) -> object
+    if current is None or current == new:
+        return new
+    if current.kind in "iuf" and new.kind in "iuf":
+        return np.result_type(current, new)
+    return np.dtype(object)
+
+def unsettled_columns(plan, inferred, pieces) -> list:
+    # Cột tự suy ra kiểu vẫn là số nguyên/bool: phần file chưa đọc có thể có ô
+    # trống làm cột thành số thực. Không có dòng nào trong khoảng thì không ảnh hưởng
+    if not pieces:
+        return []
+    return [col for col in inferred if plan[col].kind in "iub"]
+
+def read_window_csv(file_path: Path, names, columns, positions, start, end, chunksize=READ_CHUNK_ROWS,
+                    seek_point=None, dtypes=None, stats=None):
+    """Đọc các cột positions theo từng khối, chỉ giữ các dòng trong [start, end].
+
+    dtypes ({tên cột: kiểu}) được áp dụng ngay khi parse và phải là kiểu của
+    cột trên cả file (như khi pd.read_csv đọc cả file), để file output không
+    phụ thuộc vào khoảng thời gian được đọc: một ô trống ở cuối file làm cột
+    số nguyên thành số thực. Với cột chưa có trong dtypes, kiểu được suy ra
+    qua các khối đã đọc rồi phần đã lọc mới được đổi sang kiểu chung.
+
+    Dừng đọc khi cột thời gian (tăng dần) đã vượt quá end. Ngoại lệ duy nhất:
+    một cột tín hiệu tự suy ra kiểu vẫn đang là số nguyên/bool thì file được
+    đọc tới cuối, vì chỉ kiểu này mới đổi (thành số thực) khi gặp ô trống ở
+    phần sau và làm file output khác đi; số thực/chữ ghi ra giống nhau dù đọc
+    hết hay không. Cột thời gian được coi là không có ô trống. seek_point
+    (cặp vị trí byte, số thứ tự dòng) cho phép bắt đầu đọc thẳng từ giữa file
+    thay vì từ dòng đầu; index của kết quả vẫn đánh số theo dòng của cả file.
+    Khi đã nhảy qua phần đầu file mà vẫn còn cột số nguyên/bool tự suy ra kiểu
+    (phần đã bỏ qua có thể có ô trống), kết quả là None: cần đọc cả file. File trong file nén (ArchiveMember) được
+    giải nén theo luồng. Mỗi khối chỉ sao chép các dòng nằm trong khoảng
+    thời gian; nếu có stats (WindowStats), phần đó được đưa vào thống kê ngay
+    khi đọc.
+
+    Trả về (df hoặc None, {tên cột: kiểu của các khối đã đọc}).
+    """
+    time_col = columns[0]
+    dtypes = {col: np.dtype(dtype) for col, dtype in (dtypes or {}).items()}
+    inferred = [col for col in columns if col not in dtypes]
+    inferred_signals = [col for col in inferred if col != time_col]
+    plan = dict(dtypes)
+    pieces = []
+    last_time = None
+    monotonic = True
+    with ExitStack() as stack:
+        if seek_point is None:
+            first_row = 0
+            reader = pd.read_csv(stack.enter_context(open_csv(file_path)), usecols=positions, chunksize=chunksize,
+                                 dtype=dtypes)
+        else:
+            offset, first_row = seek_point
+            handle = stack.enter_context(open(file_path, "rb"))
+            handle.seek(offset)
+            reader = pd.read_csv(handle, header=None, names=names, usecols=positions, chunksize=chunksize,
+                                 dtype=dtypes)
+        stack.callback(reader.close)
+
+        for chunk in reader:
+            if first_row:
+                chunk.index += first_row
+            for col in inferred:
+                plan[col] = merge_dtype(plan.get(col), chunk[col].dtype)
+            times = chunk[time_col]
+            inside = (times >= start) & (times <= end)
+            # Lọc dòng và sắp lại thứ tự cột trong cùng một lần sao chép
+            if inside.any():
+                pieces.append(chunk.loc[inside, columns])
+                if stats is not None:
+                    stats.update(pieces[-1])
+
+            # Chỉ dừng sớm khi cột thời gian vẫn tăng dần và kiểu các cột đã chắc chắn
+            if monotonic and not times.empty:
+                monotonic = times.is_monotonic_increasing and (last_time is None or times.iloc[0] >= last_time)
+                last_time = times.iloc[-1]
+            if (monotonic and last_time is not None and last_time > end
+                    and not unsettled_columns(plan, inferred_signals, pieces)):
+                break
+
+    if seek_point is not None and unsettled_columns(plan, inferred_signals, pieces):
+        return None, plan
+    if not pieces:
+        return pd.DataFrame(columns=columns), plan
+    df = pieces[0] if len(pieces) == 1 else pd.concat(pieces)
+    changed = {col: plan[col] for col in inferred if df[col].dtype != plan[col]}
+    return (df.astype(changed) if changed else df), plan
+
+def load_time_index(file_path: Path, names, cache: LogCache, info: dict):
+    # Lấy index thời gian -> vị trí byte từ cache, chưa có thì quét file để tạo
+    if info.get("time_index") is False:
+        return None
+    if info.get("time_index"):
+        arrays = cache.load(file_path, names, ["index_time", "index_offset", "index_row"])
+        if len(arrays) == 3:
+            return {
+                "time": arrays["index_time"],
+                "offset": arrays["index_offset"],
+                "row": arrays["index_row"],
+                "rows": info["index_rows"],
+            }
+
+    index = build_time_index(file_path)
+    if index is None:
+        cache.store(file_path, names, {}, info={"time_index": False})
+        return None
+    cache.store(
+        file_path, names,
+        {"index_time": index["time"], "index_offset": index["offset"], "index_row": index["row"]},
+        info={"time_index": True, "index_rows": index["rows"]},
+    )
+    return index
+
+def cached_dtypes(names, positions, arrays: dict, info: dict) -> dict:
+    # Kiểu trên cả file của các cột đã được parse hết một lần: lấy từ cột trong
+    # cache, hoặc từ meta với cột không lưu được (vd cột chữ)
+    dtypes = {}
+    for pos in positions:
+        if pos in arrays:
+            dtypes[names[pos]] = arrays[pos].dtype
+        elif f"dtype_{pos}" in info:
+            dtypes[names[pos]] = np.dtype(info[f"dtype_{pos}"])
+    return dtypes
+
+def read_window_cached(file_path: Path, names, time_col, signal_cols, start, end, cache: LogCache,
+                       chunksize=READ_CHUNK_ROWS, precision="float64", stats=None):
+    """Đọc khoảng [start, end] nhờ cache cột và index thời gian.
+
+    - Các cột đã có trong cache: đọc bằng memory-map, cắt bằng searchsorted
+      nếu cột thời gian tăng dần.
+    - Chưa có trong cache và khoảng thời gian hẹp: nhảy thẳng tới vùng cần đọc
+      nhờ index thưa thời gian -> vị trí byte (giả định file sắp xếp theo thời
+      gian), không parse cả file. Kiểu đã biết trên cả file (cột đã cache, cột
+      chữ đã parse trước đó) được áp dụng; cột chưa biết kiểu theo quy tắc của
+      read_window_csv. Không áp dụng cho file trong file nén.
+    - Còn lại (hoặc khi read_window_csv cần đọc cả file): parse toàn bộ các
+      cột cần thiết một lần, lưu cột và kiểu của cột vào cache.
+    Cùng file và khoảng thời gian luôn cho cùng kết quả, dù cache đang ở
+    trạng thái nào. Cache luôn giữ kiểu
+    dữ liệu gốc; precision chỉ áp dụng cho phần đã cắt. stats: xem
+    read_window_csv.
+    """
+    columns = [time_col, *signal_cols]
+    signal_positions = [names.index(col) for col in signal_cols]
+    positions = sorted({0, *signal_positions})
+    arrays = cache.load(file_path, names, positions)
+    info = cache.load_info(file_path, names)
+    missing = [pos for pos in positions if pos not in arrays]
+    if missing:
+        dtypes = cached_dtypes(names, positions, arrays, info)
+        # File trong file nén không nhảy tới vị trí byte được
+        seekable = not isinstance(file_path, ArchiveMember)
+        time_index = load_time_index(file_path, names, cache, info) if seekable else None
+        if (time_index is not None and is_sorted(time_index["time"])
+                and window_fraction(time_index, start, end) < SEEK_WINDOW_FRACTION):
+            # Chỉ ép float32 khi parse với cột đã biết là số trên cả file
+            known = [col for col in signal_cols if col in dtypes]
+            df, _ = read_window_csv(file_path, names, columns, positions, start, end, chunksize,
+                                    find_seek_point(time_index, start),
+                                    {**dtypes, **signal_dtypes(known, precision, dtypes)}, stats)
+            if df is not None:
+                return df
+            if stats is not None:
+                stats.reset()
+
+        parsed = read_columns(file_path, missing, chunksize)
+        new_info = {f"dtype_{pos}": str(values.dtype) for pos, values in parsed.items()}
+        if 0 in parsed:
+            new_info["time_sorted"] = is_sorted(parsed[0])
+        cache.store(file_path, names, parsed, new_info)
+        arrays.update(parsed)
+        info.update(new_info)
+
+    times = arrays[0]
+    if info.get("time_sorted"):
+        # Cắt liền một đoạn: không cần mảng chỉ số
+        first = int(np.searchsorted(times, start, side="left"))
+        last = int(np.searchsorted(times, end, side="right"))
+        rows = slice(first, last)
+        index = pd.RangeIndex(first, last)
+    else:
+        rows = index = np.flatnonzero((times >= start) & (times <= end))
+    dtypes = signal_dtypes(signal_cols, precision, cached_dtypes(names, positions, arrays, info))
+    # Mỗi cột được sao chép đúng một lần từ memory-map (kèm đổi kiểu nếu có)
+    data = {time_col: np.array(times[rows])}
+    for col, pos in zip(signal_cols, signal_positions):
+        data[col] = np.array(arrays[pos][rows], dtype=dtypes.get(col))
+    df = pd.DataFrame(data, index=index, copy=False)
+    if stats is not None:
+        for first in range(0, len(df), chunksize):
+            stats.update(df.iloc[first:first + chunksize])
+    return df
+
+def read_signal_window(file_path: Path, signal_keys, start, end, chunksize=READ_CHUNK_ROWS, cache=None,
+                       precision="float64", stats=None):
+    """Đọc cột thời gian và các cột tín hiệu trong khoảng [start, end].
+
+    signal_keys là danh sách prefix tín hiệu; tất cả được lấy trong cùng một
+    lần đọc file. Chỉ parse các cột cần thiết theo từng khối và dừng đọc khi
+    cột thời gian (tăng dần) đã vượt quá end. Kết quả giống với việc đọc toàn
+    bộ file rồi lọc. Nếu có cache (LogCache), dùng read_window_cached.
+    precision (PRECISIONS): "float32" đọc các cột tín hiệu dạng float32.
+    stats (WindowStats): nếu có, nhận thống kê của khoảng đã đọc theo từng khối.
+    Trả về (df_filtered, time_col, signal_cols).
+    """
+    names = read_header(file_path)
+    time_col = names[0]
+    signal_cols = resolve_signal_columns(names, signal_keys, file_path.name)
+    columns = [time_col, *signal_cols]
+    positions = sorted({0, *(names.index(col) for col in signal_cols)})
+
+    if cache is not None:
+        try:
+            df_filtered = read_window_cached(file_path, names, time_col, signal_cols, start, end, cache, chunksize,
+                                             precision, stats)
+            return apply_precision(df_filtered, signal_cols, precision), time_col, signal_cols
+        except (OSError, ValueError) as error:
+            print(f"⚠ {file_path.name}: Không dùng được cache ({error}).")
+            if stats is not None:
+                stats.reset()
+
+    dtypes = signal_dtypes(signal_cols, precision)
+    try:
+        df_filtered, _ = read_window_csv(file_path, names, columns, positions, start, end, chunksize,
+                                         dtypes=dtypes, stats=stats)
+    except ValueError:
+        if not dtypes:
+            raise
+        # Có cột tín hiệu chứa chữ (không đọc được dạng float32): đọc lại với
+        # kiểu tự suy ra, apply_precision đổi sang float32 sau
+        if stats is not None:
+            stats.reset()
+        df_filtered, _ = read_window_csv(file_path, names, columns, positions, start, end, chunksize,
+                                         stats=stats)
+    return apply_precision(df_filtered, signal_cols, precision), time_col, signal_cols
+
+def decimate_minmax(x, y, n_buckets):
+    """Giảm số điểm vẽ: giữ điểm nhỏ nhất và lớn nhất trong mỗi nhóm.
+
+    Chia chuỗi thành n_buckets nhóm liên tiếp (mỗi nhóm ứng với khoảng một
+    pixel chiều ngang) nên các đỉnh nhọn vẫn được giữ lại. NaN bị bỏ qua khi
+    tìm min/max. Trả về (x, y) đã giảm, theo đúng thứ tự ban đầu.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n = len(y)
+    if n_buckets <= 0 or n <= 2 * n_buckets or y.dtype.kind not in "biuf":
+        return x, y
+
+    # argmin/argmax trả về vị trí NaN nếu nhóm có NaN: thay NaN bằng +inf/-inf
+    # để đỉnh nhọn cạnh ô trống vẫn được giữ (nhóm toàn NaN trỏ tới một dòng NaN)
+    low, high = y, y
+    if y.dtype.kind == "f":
+        missing = np.isnan(y)
+        if missing.any():
+            low = np.where(missing, np.inf, y)
+            high = np.where(missing, -np.inf, y)
+
+    size = -(-n // n_buckets)
+    n_full = n // size
+    offsets = np.arange(n_full) * size
+    keep = [low[:n_full * size].reshape(n_full, size).argmin(axis=1) + offsets,
+            high[:n_full * size].reshape(n_full, size).argmax(axis=1) + offsets,
+            [0, n - 1]]
+    if n_full * size < n:
+        keep.append([n_full * size + low[n_full * size:].argmin(),
+                     n_full * size + high[n_full * size:].argmax()])
+
+    index = np.unique(np.concatenate(keep))
+    return x[index], y[index]
+
+def create_plot(df, time_col, value_cols, filename_stem: str, decimate=True) -> bytes:
+    """Vẽ biểu đồ tín hiệu theo thời gian, trả về nội dung ảnh PNG.
+
+    Ảnh được giữ trong bộ nhớ (không ghi file tạm) nên có thể gửi từ tiến
+    trình con về và nhúng thẳng vào Excel. Khi có nhiều tín hiệu, mỗi tín hiệu
+    được vẽ trên một biểu đồ con, chung trục thời gian. Figure được dùng lại
+    giữa các file của cùng luồng/tiến trình (ChartRenderer).
+
+    decimate: giảm số điểm về khoảng số pixel theo chiều ngang của ảnh
+    (min/max mỗi pixel). Đặt False để vẽ toàn bộ điểm. Cột tín hiệu không
+    phải số (vd có ô chữ "ERR") được đổi sang số, giá trị lỗi thành NaN
+    (khoảng trống trên biểu đồ).
+    """
+    if isinstance(value_cols, str):
+        value_cols = [value_cols]
+    time_values = df[time_col].to_numpy()
+
+    series = []
+    for value_col in value_cols:
+        x = time_values
+        y = df[value_col].to_numpy()
+        if y.dtype.kind not in "biuf":
+            y = pd.to_numeric(df[value_col], errors="coerce").to_numpy(dtype=np.float64)
+        if decimate:
+            x, y = decimate_minmax(x, y, int(PLOT_FIGSIZE[0] * PLOT_DPI))
+        series.append((x, y, value_col))
+    return thread_renderer(PLOT_FIGSIZE, PLOT_DPI, tuple(PLOT_COLORS)).render(series, filename_stem)
+
+def check_output_format(output_format):
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"❌ Định dạng output không hợp lệ: {output_format}.")
+    if output_format in ("parquet", "feather"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError(f"❌ Định dạng {output_format} cần cài thư viện pyarrow.")
+
+def create_output_csv(file_path, df_filtered, output_folder: Path, output_format="csv") -> Path:
+    """Ghi dữ liệu đã lọc ra thư mục output theo output_format (OUTPUT_FORMATS).
+
+    Mặc định "csv" cho file giống hệt trước đây; các định dạng khác đổi phần
+    mở rộng của file output.
+    """
+    output_file = output_folder / f"{file_path.stem}{OUTPUT_FORMATS[output_format]}"
+    if output_format == "csv":
+        df_filtered.to_csv(output_file, index=False, encoding="utf-8-sig")
+    elif output_format == "csv-fast":
+        with open(output_file, "w", newline="", encoding="utf-8-sig", buffering=FAST_CSV_BUFFER_BYTES) as f:
+            df_filtered.to_csv(f, index=False, float_format=FAST_CSV_FLOAT_FORMAT, chunksize=READ_CHUNK_ROWS)
+    elif output_format == "csv-gz":
+        # mtime = 0 để cùng dữ liệu cho ra cùng một file nén
+        df_filtered.to_csv(output_file, index=False, encoding="utf-8-sig",
+                           compression={"method": "gzip", "compresslevel": CSV_GZIP_LEVEL, "mtime": 0})
+    elif output_format == "parquet":
+        df_filtered.to_parquet(output_file, index=False)
+    else:
+        df_filtered.reset_index(drop=True).to_feather(output_file)
+    print(f"✅ Đã tạo file: {output_file.name}")
+    return output_file
+
+def summary_styles() -> dict:
+    # Dùng chung một bộ style cho mọi ô thay vì tạo đối tượng mới cho từng ô
     thin = Side(style="thin", color="000000")
     thick = Side(style="medium", color="000000")
+    return {
+        "font_bold": Font(name="Arial", size=11, bold=True),
+        "font_regular": Font(name="Arial", size=11),
+        "align_center": Alignment(horizontal="center", vertical="center"),
+        "align_left": Alignment(horizontal="left", vertical="center"),
+        "border_thin": Border(top=thin, bottom=thin, left=thin, right=thin),
+        "border_left": Border(left=thick),
+        "border_top": Border(top=thick),
+    }
+
+def styled_cell(ws, value=None, font=None, alignment=None, border=None) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value=value)
+    if font is not None:
+        cell.font = font
+    if alignment is not None:
+        cell.alignment = alignment
+    if border is not None:
+        cell.border = border
+    return cell
+
+def write_summary_sheet(ws, entries, start_time, end_time, signal, styles: dict, image_dir: Path):
+    """Ghi một sheet summary (write-only) gồm các khối 10 cột đặt cạnh nhau.
+
+    entries là danh sách (file_path, result), result["plot"] là nội dung PNG
+    hoặc đường dẫn ảnh. Vì sheet chỉ ghi được theo từng
+    dòng, mỗi dòng được ghép từ phần tương ứng của mọi khối. Ảnh biểu đồ được
+    ghi ra image_dir và chỉ được đọc lại lúc lưu workbook.
+    """
+    labels = ["File Name(s):", "Time Range:", "Signal:"]
+    block_cols = SUMMARY_BLOCK_COLS
+
+    # Độ rộng cột, chiều cao dòng và vùng gộp ô phải có trước khi ghi dòng
+    for idx, (file_path, result) in enumerate(entries):
+        base_col = 1 + idx * block_cols
+        for col in range(base_col, base_col + block_cols):
+            ws.column_dimensions[get_column_letter(col)].width = 14 if col == base_col else 10
+        for i in range(1, len(labels) + 1):
+            ws.merged_cells.add(f"{get_column_letter(base_col + 1)}{i}:{get_column_letter(base_col + block_cols - 1)}{i}")
 
-    for idx, (file_path, result) in enumerate(results.items()):
-        col_offset = idx * 10
-        base_col = 1 + col_offset
-        labels = ["File Name(s):", "Time Range:", "Signal:"]
-        values = [file_path.stem, f"{start_time} - {end_time}", signal]
-
-        for i, label in enumerate(labels, start=1):
-            label_cell = ws.cell(row=i, column=base_col, value=label)
-            label_cell.font = font_bold
-            label_cell.alignment = align_center
-            ws.merge_cells(start_row=i, start_column=base_col + 1, end_row=i, end_column=base_col + 9)
-            value_cell = ws.cell(row=i, column=base_col + 1, value=values[i - 1])
-            value_cell.font = font_regular
-            value_cell.alignment = align_left
-
-        for col in range(base_col, base_col + 10):
-            col_letter = get_column_letter(col)
-            ws.column_dimensions[col_letter].width = 14 if col == base_col else 10
-
-        for row_i in range(1, 4):
-            for col_j in range(base_col, base_col + 10):
-                ws.cell(row=row_i, column=col_j).border = Border(top=thin, bottom=thin, left=thin, right=thin)
-
-        for row in range(1, 37):
-            ws.cell(row=row, column=base_col + 10).border = Border(left=thick)
-        for col in range(base_col, base_col + 10):
-            ws.cell(row=37, column=col).border = Border(top=thick)
-
-        chart_path = result["plot"]
-        if chart_path.exists():
-            img = XLImage(str(chart_path))
-            img.width, img.height = 700, 680
-            img_cell = f"{get_column_letter(base_col + 1)}6"
-            ws.add_image(img, img_cell)
-
-    for row in range(1, ws.max_row + 1):
+        chart = result["plot"]
+        if chart:
+            # Ảnh có thể là nội dung PNG hoặc đường dẫn tới file PNG đã lưu sẵn
+            if isinstance(chart, Path):
+                image_path = chart
+            else:
+                image_path = image_dir / f"{ws.title}_{idx}.png"
+                image_path.write_bytes(chart)
+            img = XLImage(str(image_path))
+            img.width, img.height = SUMMARY_IMAGE_SIZE
+            ws.add_image(img, f"{get_column_letter(base_col + 1)}{SUMMARY_IMAGE_ROW}")
+    for row in range(1, SUMMARY_BLOCK_ROWS + 1):
         ws.row_dimensions[row].height = 18.75
 
-    wb.save(summary_path)
+    for row in range(1, SUMMARY_BLOCK_ROWS + 1):
+        cells = []
+        for idx, (file_path, result) in enumerate(entries):
+            if row <= len(labels):
+                values = [file_path.stem, f"{start_time} - {end_time}", signal]
+                cells.append(styled_cell(ws, labels[row - 1], styles["font_bold"], styles["align_center"],
+                                         styles["border_thin"]))
+                cells.append(styled_cell(ws, values[row - 1], styles["font_regular"], styles["align_left"],
+                                         styles["border_thin"]))
+                cells.extend(styled_cell(ws, border=styles["border_thin"]) for _ in range(block_cols - 2))
+            elif row < SUMMARY_BLOCK_ROWS:
+                # Đường kẻ đậm ngăn cách với khối phía trước
+                cells.append(styled_cell(ws, border=styles["border_left"]) if idx > 0 else None)
+                cells.extend([None] * (block_cols - 1))
+            else:
+                cells.extend(styled_cell(ws, border=styles["border_top"]) for _ in range(block_cols))
+        if row < SUMMARY_BLOCK_ROWS:
+            cells.append(styled_cell(ws, border=styles["border_left"]))
+        ws.append(cells)
+
+def write_stats_sheet(ws, entries, styles: dict):
+    # Bảng thống kê: mỗi dòng một tín hiệu của một file, ô trống nếu không áp dụng
+    headers = ["File Name", "Signal"] + STATS_HEADERS
+    ws.column_dimensions["A"].width = 24
+    ws.column_dimensions["B"].width = 18
+    for col in range(3, len(headers) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 12
+    ws.freeze_panes = "C2"
+    ws.append([styled_cell(ws, header, styles["font_bold"], styles["align_center"], styles["border_thin"])
+               for header in headers])
+    for file_path, result in entries:
+        for signal_col, stats in result.get("stats", {}).items():
+            values = [file_path.stem, signal_col] + [stats.get(field) for field in STAT_FIELDS]
+            ws.append([styled_cell(ws, value, styles["font_regular"], styles["align_left"], styles["border_thin"])
+                       for value in values])
+
+def create_summary_excel(results: dict, start_time, end_time, signal, output_folder: Path,
+                         files_per_sheet=SUMMARY_FILES_PER_SHEET, report=None):
+    """Tạo summary.xlsx: mỗi file một khối gồm thông tin và biểu đồ.
+
+    Workbook được ghi ở chế độ write-only nên bộ nhớ không tăng theo số ô;
+    ảnh được đọc từ thư mục tạm lần lượt khi lưu. files_per_sheet giới hạn số
+    file trên một sheet (None = tất cả trên sheet "Summary"). Nếu result có
+    "stats", các thống kê được ghi vào sheet "Statistics" sau cùng. report
+    (RunReport) nhận thời gian của bước dựng sheet và bước lưu file.
+    """
+    summary_path = output_folder / "summary.xlsx"
+    entries = list(results.items())
+    if not files_per_sheet:
+        files_per_sheet = max(len(entries), 1)
+    styles = summary_styles()
+    report = report if report is not None else RunReport()
+
+    wb = Workbook(write_only=True)
+    with tempfile.TemporaryDirectory(prefix="summary_") as image_dir:
+        with report.stage("summary_layout") as record:
+            for page, first in enumerate(range(0, len(entries), files_per_sheet), start=1):
+                ws = wb.create_sheet("Summary" if page == 1 else f"Summary {page}")
+                write_summary_sheet(ws, entries[first:first + files_per_sheet], start_time, end_time, signal,
+                                    styles, Path(image_dir))
+            if any(result.get("stats") for _, result in entries):
+                write_stats_sheet(wb.create_sheet("Statistics"), entries, styles)
+            record["rows"] = len(entries)
+        with report.stage("summary_save") as record:
+            wb.save(summary_path)
+            record["bytes_out"] = summary_path.stat().st_size
     print(f"📄 Đã tạo file summary: {summary_path.name}")
     print(f"🖼️ Đã đưa vào Excel {len(results)} ảnh.")
 
-def run_processing(input_folder, base_output_folder, signal_selection, start_time_str, end_time_str):
+def process_file(file_path: Path, signal_prefixes, start, end, output_path: Path, decimate=True, cache=None,
+                 thresholds=None, output_format="csv", chart_dir=None, precision="float64", report=None):
+    """Xử lý một file log: lọc dữ liệu các tín hiệu, ghi CSV, vẽ biểu đồ và
+    tính thống kê từng tín hiệu.
+
+    Trả về None nếu không có dòng nào nằm trong khoảng thời gian. thresholds
+    ({prefix: ngưỡng}) dùng để đếm số lần cắt ngưỡng. output_format là một
+    khóa của OUTPUT_FORMATS. chart_dir: nếu có, ảnh biểu đồ được ghi ra
+    chart_dir/<tên file>.png và kết quả chỉ giữ đường dẫn. precision: xem
+    read_signal_window. report (RunReport) nhận thời gian, số dòng và số byte
+    của từng bước.
+
+    Kết quả chỉ gồm thông tin nhỏ (ảnh hoặc đường dẫn ảnh, thống kê, tên file
+    output, số dòng); dữ liệu đã lọc được giải phóng ngay khi hàm kết thúc.
+    """
+    report = report if report is not None else RunReport()
+    # Thống kê được tính theo từng khối ngay trong bước đọc
+    window_stats = WindowStats(thresholds)
+
+    with report.stage("read", file_path) as record:
+        df_filtered, time_col, signal_cols = read_signal_window(file_path, signal_prefixes, start, end, cache=cache,
+                                                                precision=precision, stats=window_stats)
+        record["rows"] = len(df_filtered)
+        record["bytes_in"] = file_path.stat().st_size
+
+    if df_filtered.empty:
+        print(f"⚠ {file_path.name}: Không có dòng nào thỏa mãn.")
+        return None
+
+    with report.stage("output_csv", file_path) as record:
+        output_file = create_output_csv(file_path, df_filtered, output_path, output_format)
+        record["rows"] = len(df_filtered)
+        record["bytes_out"] = output_file.stat().st_size
+    with report.stage("plot", file_path) as record:
+        chart_png = create_plot(df_filtered, time_col, signal_cols, file_path.stem, decimate)
+        record["rows"] = len(df_filtered)
+        record["bytes_out"] = len(chart_png)
+        if chart_dir is not None:
+            chart = Path(chart_dir) / f"{file_path.stem}.png"
+            chart.write_bytes(chart_png)
+            chart_png = chart
+    print(f"📊 Đã tạo biểu đồ: {file_path.stem}")
+    with report.stage("stats", file_path) as record:
+        stats = window_stats.result(signal_cols)
+        record["rows"] = len(df_filtered)
+
+    return {
+        "plot": chart_png,
+        "stats": stats,
+        "output": output_file.name,
+        "rows": len(df_filtered)
+    }
+
+def file_memory_cost(file_path: Path) -> int:
+    # Ước lượng thô (và dư) bộ nhớ cần để xử lý một file: kích thước file trên đĩa
+    try:
+        return file_path.stat().st_size
+    except OSError:
+        return 0
+
+def process_file_timed(*args):
+    # Dùng cho tiến trình con: trả về kết quả kèm các bản ghi thời gian
+    report = RunReport()
+    result = process_file(*args, report=report)
+    return result, report.records
+
+def run_processing(input_folder, base_output_folder, signal_selection, start_time_str, end_time_str, workers=1,
+                   progress_callback=None, cancel_event=None, decimate=True, use_cache=True, cache_dir=None,
+                   files_per_sheet=SUMMARY_FILES_PER_SHEET, report_stages=False, profile=False, incremental=False,
+                   executor=None, thresholds=None, output_format="csv", memory_budget_mb=None, precision="float64"):
+    """Chạy toàn bộ quy trình xử lý cho thư mục input.
+
+    signal_selection: tên một tín hiệu trong SIGNAL_MAP hoặc danh sách tên;
+    mọi tín hiệu được lấy trong một lần đọc mỗi file.
+    workers: số tiến trình xử lý song song các file (1 = chạy tuần tự,
+    None = dùng tất cả CPU).
+    executor: ProcessPoolExecutor dùng chung cho nhiều lần chạy (ví dụ khi
+    chạy nhiều job liên tiếp); khi có executor thì bỏ qua workers.
+    thresholds: {prefix: ngưỡng} để đếm số lần cắt ngưỡng trong sheet
+    Statistics của summary (bổ sung cho STAT_THRESHOLDS).
+    output_format: định dạng file output của từng file log (OUTPUT_FORMATS),
+    mặc định "csv" giống hệt các phiên bản trước.
+    memory_budget_mb: giới hạn (MB) tổng kích thước các file đang được xử lý
+    cùng lúc khi chạy song song; luôn có ít nhất một file. None = không giới
+    hạn (chỉ giới hạn bởi workers).
+    precision: "float64" (mặc định, giữ kiểu dữ liệu như trước) hoặc "float32"
+    (các cột tín hiệu dạng float32, giảm bộ nhớ của bước đọc, file output ghi
+    số với độ chính xác float32).
+    progress_callback: hàm progress_callback(done, total, file_path) được gọi
+    sau mỗi file (kể cả file lỗi).
+    cancel_event: đối tượng có is_set() (ví dụ threading.Event). Khi được set,
+    việc xử lý dừng giữa hai file và summary chỉ gồm các file đã xong.
+    decimate: giảm số điểm khi vẽ biểu đồ (False = vẽ chính xác mọi điểm).
+    use_cache: lưu các cột đã parse vào cache để các lần chạy sau đọc nhanh hơn
+    (cache_dir = None dùng thư mục cache mặc định của người dùng).
+    files_per_sheet: số file tối đa trên một sheet của summary.xlsx.
+    report_stages: ghi run_report.json/run_report.csv (thời gian, số dòng, số
+    byte của từng bước cho từng file) vào thư mục output.
+    profile: chạy dưới cProfile, ghi profile.prof/profile.txt vào thư mục output.
+    Khi profile, các file luôn được xử lý tuần tự trong tiến trình hiện tại (bỏ
+    qua workers và executor) để profile đo được toàn bộ công việc.
+    incremental: chỉ xử lý các file mới hoặc đã thay đổi so với lần chạy trước
+    (theo manifest trong thư mục output); summary dùng lại biểu đồ đã lưu của
+    các file không đổi.
+    Dữ liệu của mỗi file được giải phóng ngay khi ghi xong output; ảnh biểu đồ
+    được ghi ra đĩa nên bước summary chỉ nhận thông tin nhỏ của từng file.
+    Trả về dict gồm "cancelled" (bị hủy giữa chừng), "processed" (số file đã
+    xử lý), "failed" và "skipped" (tên các file lỗi / bị bỏ qua do thiếu tín hiệu).
+    """
     input_path = Path(input_folder)
     base_output_path = Path(base_output_folder)
 
@@ -152,40 +841,217 @@ def run_processing(input_folder, base_output_folder, signal_selection, start_tim
     csv_files = get_csv_files(input_path)
 
     # Kiểm tra tín hiệu
-    signal_prefix = SIGNAL_MAP.get(signal_selection)
-    if not signal_prefix:
-        raise ValueError("❌ Tín hiệu không hợp lệ.")
+    signal_prefixes = parse_signals(signal_selection)
 
     # Kiểm tra thời gian
     start, end = parse_time(start_time_str, end_time_str)
 
+    # Kiểm tra định dạng output và độ chính xác
+    check_output_format(output_format)
+    check_precision(precision)
+
+    # Chỉ đọc dòng tiêu đề để loại trước các file không có tín hiệu
+    file_signals = build_header_index(csv_files, signal_prefixes)
+    if not file_signals:
+        raise ValueError("⚠ Không có file nào chứa tín hiệu đã chọn.")
+    skipped = [file_path.name for file_path in csv_files if file_path not in file_signals]
+    csv_files = list(file_signals)
+
     # Chỉ tạo thư mục output sau khi tất cả đầu vào hợp lệ
     output_path = ensure_output_folder(base_output_path)
 
+    # Chế độ incremental: bỏ qua các file đã xử lý với cùng thiết lập
+    manifest = Manifest(output_path) if incremental else None
+    pending_files = csv_files
+    if manifest is not None:
+        pending_files = [
+            file_path for file_path in csv_files
+            if not manifest.is_fresh(file_path, file_signals[file_path], start, end, thresholds, output_format,
+                                     precision)
+        ]
+        print(f"♻ Dùng lại {len(csv_files) - len(pending_files)} file, cần xử lý {len(pending_files)} file.")
+
+    def is_cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    def report(done, file_path):
+        if progress_callback is not None:
+            progress_callback(done, len(pending_files), file_path)
+
+    cache = LogCache(cache_dir) if use_cache else None
+    run_report = RunReport()
+
     results = {}
-    for file_path in csv_files:
+    processed = []
+    failed = []
+    cancelled = False
+    if profile and (executor is not None or workers != 1):
+        # cProfile chỉ đo tiến trình hiện tại: chạy tuần tự để profile có cả
+        # phần xử lý từng file thay vì chỉ thấy tiến trình cha chờ kết quả
+        print("🔬 Chế độ profile: xử lý tuần tự trong một tiến trình.")
+        executor = None
+        workers = 1
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(pending_files))
+    budget = memory_budget_mb * 1024 * 1024 if memory_budget_mb else None
+
+    # Ảnh biểu đồ được ghi ra đĩa ngay trong bước xử lý từng file; ở chế độ
+    # incremental ghi thẳng vào thư mục ảnh của manifest
+    if manifest is not None:
+        chart_folder = nullcontext(manifest.charts_folder())
+    else:
+        chart_folder = tempfile.TemporaryDirectory(prefix="charts_")
+
+    with profiled(output_path, enabled=profile), chart_folder as chart_dir:
+        chart_dir = Path(chart_dir)
+        if executor is None and workers <= 1:
+            for done, file_path in enumerate(pending_files, start=1):
+                if is_cancelled():
+                    cancelled = True
+                    break
+                try:
+                    result = process_file(file_path, file_signals[file_path], start, end, output_path, decimate,
+                                          cache, thresholds, output_format, chart_dir, precision, run_report)
+                    processed.append(file_path)
+                except Exception as error:
+                    print(f"❌ Lỗi khi xử lý {file_path.name}: {error}")
+                    failed.append(file_path.name)
+                    result = None
+                if result is not None:
+                    results[file_path] = result
+                report(done, file_path)
+        else:
+            def collect(file_path, future):
+                try:
+                    result, records = future.result()
+                    run_report.extend(records)
+                    processed.append(file_path)
+                except Exception as error:
+                    print(f"❌ Lỗi khi xử lý {file_path.name}: {error}")
+                    failed.append(file_path.name)
+                    result = None
+                if result is not None:
+                    results[file_path] = result
+
+            pool = ProcessPoolExecutor(max_workers=workers) if executor is None else nullcontext(executor)
+            with pool as pool_executor:
+                queue = deque(pending_files)
+                in_flight = deque()
+                load = 0
+                done = 0
+                while queue or in_flight:
+                    # Gửi thêm file khi tổng kích thước đang xử lý còn trong giới hạn bộ nhớ
+                    while queue and not is_cancelled() and (
+                            budget is None or not in_flight or load + file_memory_cost(queue[0]) <= budget):
+                        file_path = queue.popleft()
+                        future = pool_executor.submit(process_file_timed, file_path, file_signals[file_path], start,
+                                                      end, output_path, decimate, cache, thresholds, output_format,
+                                                      chart_dir, precision)
+                        in_flight.append((file_path, future, file_memory_cost(file_path)))
+                        load += in_flight[-1][2]
+                    if is_cancelled():
+                        cancelled = True
+                        # Hủy các file chưa bắt đầu. Các file đang chạy vẫn ghi
+                        # output nên được chờ xong và đưa vào summary/manifest
+                        # (theo đúng thứ tự file ban đầu)
+                        running = [(file_path, future) for file_path, future, _ in in_flight if not future.cancel()]
+                        for file_path, future in running:
+                            collect(file_path, future)
+                            done += 1
+                            report(done, file_path)
+                        break
+                    # Lấy kết quả theo đúng thứ tự file ban đầu
+                    file_path, future, cost = in_flight.popleft()
+                    load -= cost
+                    collect(file_path, future)
+                    done += 1
+                    report(done, file_path)
+
+        if cancelled:
+            print(f"⏹ Đã dừng xử lý sau {len(processed)}/{len(pending_files)} file.")
+
+        summary_results = results
+        changed = bool(processed)
+        if manifest is not None:
+            for file_path in processed:
+                result = results.get(file_path)
+                manifest.record(file_path, file_signals[file_path], start, end, result["plot"] if result else None,
+                                thresholds, result["stats"] if result else None, output_format,
+                                result["output"] if result else None, precision)
+            changed = manifest.prune(csv_files) or changed
+            manifest.save()
+            # Summary gồm cả file mới xử lý và file dùng lại (ảnh đã lưu)
+            summary_results = {}
+            for file_path in csv_files:
+                if file_path in results:
+                    summary_results[file_path] = results[file_path]
+                elif manifest.is_fresh(file_path, file_signals[file_path], start, end, thresholds, output_format,
+                                       precision):
+                    chart_path = manifest.chart_path(file_path)
+                    if chart_path is not None:
+                        summary_results[file_path] = {"plot": chart_path, "stats": manifest.stats(file_path)}
+            if not (output_path / "summary.xlsx").exists():
+                changed = True
+
+        if summary_results and (changed or manifest is None):
+            create_summary_excel(summary_results, start, end, ", ".join(signal_prefixes), output_path,
+                                 files_per_sheet, run_report)
+        elif manifest is not None and not changed:
+            print("✔ Không có file mới hoặc thay đổi, giữ nguyên summary.")
+
+    if report_stages:
+        run_report.print_totals()
+        print(f"📄 Đã ghi báo cáo: {run_report.write(output_path).name}")
+
+    return {"cancelled": cancelled, "processed": len(processed), "failed": failed, "skipped": skipped}
+
+def csv_snapshot(input_path: Path) -> dict:
+    # (kích thước, mtime) của từng file .csv/.zip/.gz để phát hiện file mới hoặc thay đổi
+    snapshot = {}
+    for file_path in [path for pattern in ["*.csv", *ARCHIVE_PATTERNS] for path in input_path.glob(pattern)]:
         try:
-            df = pd.read_csv(file_path)
-            time_col = df.columns[0]
-            signal_col = find_column(df, signal_prefix)
-            df_filtered = df[[time_col, signal_col]]
-            df_filtered = df_filtered[(df_filtered[time_col] >= start) & (df_filtered[time_col] <= end)]
-
-            if df_filtered.empty:
-                print(f"⚠ {file_path.name}: Không có dòng nào thỏa mãn.")
-                continue
+            stat = file_path.stat()
+        except OSError:
+            continue
+        snapshot[file_path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
 
-            create_output_csv(file_path, df_filtered, output_path)
-            plot_path = create_plot(df_filtered, time_col, signal_col, file_path.stem, output_path)
-            print(f"📊 Đã tạo biểu đồ: {plot_path.name}")
+def watch_folder(input_folder, base_output_folder, signal_selection, start_time_str, end_time_str,
+                 interval=WATCH_INTERVAL, stop_event=None, **options):
+    """Theo dõi thư mục input, tự xử lý file mới/thay đổi và cập nhật summary.
 
-            results[file_path] = {
-                "df": df_filtered,
-                "plot": plot_path
-            }
-        except Exception as error:
-            print(f"❌ Lỗi khi xử lý {file_path.name}: {error}")
+    Dùng chế độ incremental của run_processing. Một file chỉ được xử lý khi
+    kích thước và mtime không đổi giữa hai lần kiểm tra liên tiếp (đã chép
+    xong). Dừng khi stop_event được set (hoặc Ctrl+C). Các tham số còn lại
+    được chuyển cho run_processing.
+    """
+    input_path = Path(input_folder)
+    if not input_path.is_dir():
+        raise FileNotFoundError(f"❌ Thư mục input không tồn tại: {input_path}")
+    parse_signals(signal_selection)
+    parse_time(start_time_str, end_time_str)
+    # Ngoài dừng giữa hai lần kiểm tra, stop_event cũng dừng run_processing giữa hai file
+    options.setdefault("cancel_event", stop_event)
 
-    if results:
-        create_summary_excel(results, start, end, signal_prefix, output_path)
-        cleanup_png_files(output_path)
+    print(f"👀 Đang theo dõi thư mục: {input_path}")
+    processed_snapshot = None
+    previous_snapshot = None
+    try:
+        while stop_event is None or not stop_event.is_set():
+            snapshot = csv_snapshot(input_path)
+            if snapshot and snapshot == previous_snapshot and snapshot != processed_snapshot:
+                try:
+                    run_processing(input_folder, base_output_folder, signal_selection, start_time_str, end_time_str,
+                                   incremental=True, **options)
+                except (FileNotFoundError, ValueError) as error:
+                    print(error)
+                processed_snapshot = snapshot
+            previous_snapshot = snapshot
+            if stop_event is not None:
+                stop_event.wait(interval)
+            else:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    print("⏹ Đã dừng theo dõi thư mục.")
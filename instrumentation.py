@@ -0,0 +1,88 @@
+import cProfile
+import csv
+import io
+import json
+import pstats
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+REPORT_FIELDS = ["file", "stage", "seconds", "rows", "bytes_in", "bytes_out"]
+
+class RunReport:
+    """Ghi lại thời gian, số dòng và số byte đọc/ghi của từng bước xử lý.
+
+    Mỗi bản ghi là một dict theo REPORT_FIELDS. Bản ghi được tạo ở tiến trình
+    con có thể gửi về và gộp lại bằng extend().
+    """
+
+    def __init__(self):
+        self.started = datetime.now()
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, file_path=None):
+        # Đo thời gian một bước; khối with điền thêm rows/bytes_in/bytes_out vào record
+        record = {"file": file_path.name if file_path else "", "stage": name,
+                  "seconds": 0.0, "rows": 0, "bytes_in": 0, "bytes_out": 0}
+        began = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - began
+            self.records.append(record)
+
+    def extend(self, records):
+        self.records.extend(records)
+
+    def totals(self) -> dict:
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record["stage"], {"seconds": 0.0, "rows": 0, "bytes_in": 0, "bytes_out": 0,
+                                                        "count": 0})
+            for key in ("seconds", "rows", "bytes_in", "bytes_out"):
+                total[key] += record[key]
+            total["count"] += 1
+        return totals
+
+    def print_totals(self):
+        for stage, total in self.totals().items():
+            print(f"⏱ {stage}: {total['seconds']:.2f} s ({total['count']} lần)")
+
+    def write(self, output_folder: Path) -> Path:
+        """Ghi run_report.json (chi tiết + tổng theo bước) và run_report.csv."""
+        json_path = output_folder / "run_report.json"
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "started": self.started.isoformat(timespec="seconds"),
+                "totals": self.totals(),
+                "records": self.records,
+            }, f, indent=2, ensure_ascii=False)
+        with open(output_folder / "run_report.csv", "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.records)
+        return json_path
+
+@contextmanager
+def profiled(output_folder: Path, enabled=True, top=30):
+    """Chạy khối lệnh dưới cProfile, ghi profile.prof và profile.txt.
+
+    Chỉ đo được tiến trình hiện tại: khi xử lý song song, phần việc trong các
+    tiến trình con không có trong kết quả.
+    """
+    if not enabled:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(str(output_folder / "profile.prof"))
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(top)
+        (output_folder / "profile.txt").write_text(text.getvalue(), encoding="utf-8")
+        print(f"🔬 Đã ghi profile: {output_folder / 'profile.prof'}")
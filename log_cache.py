@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+import numpy as np
+
+# Dung lượng tối đa của cache, vượt quá thì xóa các mục lâu không dùng nhất
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+META_FILE = "meta.json"
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("MINIPROJECT_CACHE_DIR")
+    if base:
+        return Path(base)
+    base = os.environ.get("LOCALAPPDATA")
+    if base:
+        return Path(base) / "miniproject" / "cache"
+    return Path.home() / ".cache" / "miniproject"
+
+def file_fingerprint(file_path: Path) -> dict:
+    stat = file_path.stat()
+    return {"path": str(file_path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+class LogCache:
+    """Cache dạng cột cho các file log CSV đã parse.
+
+    Mỗi file log có một thư mục riêng (đặt tên theo hash đường dẫn), mỗi cột
+    là một file .npy được đọc lại bằng memory-map (khóa là vị trí cột, hoặc tên
+    cho các mảng phụ như index thời gian). meta.json lưu dấu vân tay
+    (đường dẫn, kích thước, mtime) của file CSV: khi file thay đổi thì mục
+    cache cũ bị xóa. Khi tổng dung lượng vượt max_bytes, các mục lâu không
+    dùng nhất bị xóa trước (LRU theo mtime của meta.json).
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def entry_dir(self, file_path: Path) -> Path:
+        key = hashlib.sha1(str(file_path.resolve()).encode("utf-8")).hexdigest()
+        return self.cache_dir / key
+
+    def read_meta(self, entry: Path):
+        try:
+            with open(entry / META_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_meta(self, entry: Path, meta: dict):
+        tmp = entry / f"{META_FILE}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, entry / META_FILE)
+
+    def valid_meta(self, file_path: Path, header: list):
+        """Trả về meta của mục cache nếu còn khớp với file, ngược lại xóa mục đó."""
+        entry = self.entry_dir(file_path)
+        meta = self.read_meta(entry)
+        if meta is None:
+            return None
+        if meta.get("fingerprint") != file_fingerprint(file_path) or meta.get("header") != header:
+            self.remove(entry)
+            return None
+        return meta
+
+    def load(self, file_path: Path, header: list, keys):
+        """Trả về {khóa: mảng memory-map} cho các cột/mảng đã có trong cache."""
+        meta = self.valid_meta(file_path, header)
+        if meta is None:
+            return {}
+        entry = self.entry_dir(file_path)
+        columns = {}
+        for key in keys:
+            if str(key) not in meta["columns"]:
+                continue
+            try:
+                columns[key] = np.load(entry / f"{key}.npy", mmap_mode="r")
+            except (OSError, ValueError):
+                continue
+        if columns:
+            # Đánh dấu vừa được dùng để LRU giữ lại mục này
+            os.utime(entry / META_FILE)
+        return columns
+
+    def load_info(self, file_path: Path, header: list) -> dict:
+        # Thông tin phụ (ví dụ cột thời gian có tăng dần không) đi kèm mục cache
+        meta = self.valid_meta(file_path, header)
+        return meta.get("info", {}) if meta else {}
+
+    def store(self, file_path: Path, header: list, arrays: dict, info=None):
+        """Lưu các cột {khóa: mảng numpy} của file vào cache.
+
+        Chỉ cột kiểu số/bool được lưu; các cột khác bị bỏ qua. info là dict
+        thông tin phụ được gộp vào meta.json.
+        """
+        arrays = {key: values for key, values in arrays.items() if values.dtype.kind in "biuf"}
+        if not arrays and not info:
+            return
+
+        entry = self.entry_dir(file_path)
+        meta = self.valid_meta(file_path, header)
+        if meta is None:
+            meta = {"fingerprint": file_fingerprint(file_path), "header": header, "columns": {}}
+        entry.mkdir(parents=True, exist_ok=True)
+
+        for key, values in arrays.items():
+            tmp = entry / f"{key}.{os.getpid()}.tmp.npy"
+            np.save(tmp, np.ascontiguousarray(values))
+            os.replace(tmp, entry / f"{key}.npy")
+            meta["columns"][str(key)] = str(values.dtype)
+        if info:
+            meta.setdefault("info", {}).update(info)
+        self.write_meta(entry, meta)
+
+        self.evict(keep=entry)
+
+    def remove(self, entry: Path):
+        shutil.rmtree(entry, ignore_errors=True)
+
+    def evict(self, keep=None):
+        if not self.cache_dir.is_dir():
+            return
+        entries = []
+        total = 0
+        for entry in self.cache_dir.iterdir():
+            if not entry.is_dir():
+                continue
+            try:
+                size = sum(f.stat().st_size for f in entry.iterdir())
+                last_used = (entry / META_FILE).stat().st_mtime
+            except OSError:
+                continue
+            entries.append((last_used, size, entry))
+            total += size
+
+        for last_used, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            self.remove(entry)
+            total -= size
+
+    def clear(self):
+        self.remove(self.cache_dir)
@@ -1,8 +1,121 @@
 import sys
+import time
+# Mốc bắt đầu để đo thời gian khởi động (tới khi cửa sổ hiện)
+STARTED_AT = time.perf_counter()
+import math
+import threading
+import multiprocessing
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt5.QtWidgets import QApplication, QMainWindow, QFileDialog, QMessageBox
 from GUI import Ui_MainWindow
-from funtion_process import run_processing
 from pathlib import Path
+# funtion_process (pandas, matplotlib, openpyxl) không được import ở đây để cửa
+# sổ hiện nhanh; nó được nạp ở luồng nền sau khi cửa sổ đã hiện (warm_up) hoặc
+# khi bắt đầu xử lý
+
+def warm_up():
+    began = time.perf_counter()
+    import funtion_process  # noqa: F401
+    print(f"📦 Đã nạp thư viện xử lý sau {time.perf_counter() - began:.2f} s")
+
+class ProcessingWorker(QThread):
+    # done, total, tên file, số file/s, MB/s, thời gian đã chạy (s)
+    progress = pyqtSignal(int, int, str, float, float, float)
+    completed = pyqtSignal(bool)
+    failed = pyqtSignal(str)
+
+    def __init__(self, input_path, output_path, signals, start_time, end_time, workers=None, report_stages=False,
+                 profile=False, incremental=False, watch=False, output_format="csv", compare=False, parent=None):
+        super().__init__(parent)
+        self.input_path = input_path
+        self.output_path = output_path
+        self.signals = signals
+        self.start_time = start_time
+        self.end_time = end_time
+        self.workers = workers
+        self.report_stages = report_stages
+        self.profile = profile
+        self.incremental = incremental
+        self.watch = watch
+        self.output_format = output_format
+        self.compare = compare
+        self.cancel_event = threading.Event()
+        self.started_at = 0.0
+        self.bytes_done = 0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def report_progress(self, done, total, file_path):
+        try:
+            self.bytes_done += file_path.stat().st_size
+        except OSError:
+            pass
+        elapsed = time.perf_counter() - self.started_at
+        files_per_s = done / elapsed if elapsed > 0 else 0.0
+        mb_per_s = self.bytes_done / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+        self.progress.emit(done, total, file_path.name, files_per_s, mb_per_s, elapsed)
+
+    def run(self):
+        # Chờ luồng warm_up nạp xong (nếu chưa) rồi dùng lại module đã nạp
+        from funtion_process import run_processing, watch_folder
+        from comparison import run_comparison
+        self.started_at = time.perf_counter()
+        self.bytes_done = 0
+        options = {
+            "workers": self.workers,
+            "progress_callback": self.report_progress,
+            "report_stages": self.report_stages,
+            "profile": self.profile,
+            "output_format": self.output_format,
+        }
+        try:
+            if self.watch:
+                # Theo dõi thư mục tới khi bấm Cancel
+                watch_folder(self.input_path, self.output_path, self.signals, self.start_time, self.end_time,
+                             stop_event=self.cancel_event, **options)
+                cancelled = True
+            else:
+                outcome = run_processing(
+                    self.input_path, self.output_path, self.signals, self.start_time, self.end_time,
+                    cancel_event=self.cancel_event, incremental=self.incremental, **options
+                )
+                cancelled = outcome["cancelled"]
+                if self.compare and not cancelled:
+                    # Biểu đồ chồng và CSV so sánh các file, ghi cùng thư mục output
+                    run_comparison(self.input_path, self.output_path, self.signals, self.start_time, self.end_time)
+        except Exception as error:
+            self.failed.emit(str(error))
+            return
+        self.completed.emit(cancelled)
+
+class PreviewWorker(QThread):
+    # Tên các file trong thư mục input, rồi SignalPyramid của file được chọn
+    listed = pyqtSignal(list)
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, input_path, file_name, signal, parent=None):
+        super().__init__(parent)
+        self.input_path = input_path
+        self.file_name = file_name
+        self.signal = signal
+
+    def run(self):
+        from funtion_process import SIGNAL_MAP, get_csv_files
+        from preview import load_pyramid
+        try:
+            csv_files = sorted(get_csv_files(Path(self.input_path)), key=lambda file_path: file_path.name)
+            self.listed.emit([file_path.name for file_path in csv_files])
+            # File đang chọn, hoặc file đầu tiên nếu chưa chọn (hay không còn trong thư mục)
+            file_path = next((file_path for file_path in csv_files if file_path.name == self.file_name),
+                             csv_files[0])
+            # Dùng chung cache với bước xử lý: lần xem sau và lần chạy sau đều nhanh hơn
+            pyramid = load_pyramid(file_path, SIGNAL_MAP[self.signal])
+        except Exception as error:
+            self.failed.emit(str(error))
+            return
+        self.loaded.emit(pyramid)
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -10,47 +123,175 @@ class MainWindow(QMainWindow):
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
         self.setWindowTitle("Mini Project GUI")
+        self.worker = None
+        self.preview_worker = None
 
         # Kết nối nút
         self.ui.Input_button.clicked.connect(self.select_input_folder)
         self.ui.Output_button.clicked.connect(self.select_output_folder)
         self.ui.Start_button.clicked.connect(self.start_processing)
+        self.ui.Cancel_button.clicked.connect(self.cancel_processing)
+        self.ui.Preview_button.clicked.connect(self.start_preview)
+        self.ui.Preview_file.activated.connect(self.start_preview)
+        self.ui.Preview.region_selected.connect(self.select_time_range)
+
+    def window_shown(self, measure_only=False):
+        # Gọi ngay sau lần vẽ đầu tiên của cửa sổ
+        startup = time.perf_counter() - STARTED_AT
+        print(f"🚀 Khởi động sau {startup:.2f} s")
+        self.ui.statusbar.showMessage(f"🚀 Khởi động sau {startup:.2f} s")
+        if measure_only:
+            QApplication.quit()
+            return
+        threading.Thread(target=warm_up, daemon=True).start()
 
     def select_input_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Chọn thư mục Input")
         if folder:
             self.ui.Input_Folder.setText(folder)
+            self.ui.Preview_file.clear()
 
     def select_output_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Chọn thư mục Output")
         if folder:
             self.ui.Output_Folder.setText(folder)
 
+    def selected_signals(self):
+        return [
+            self.ui.Signal.item(row).text()
+            for row in range(self.ui.Signal.count())
+            if self.ui.Signal.item(row).checkState() == Qt.Checked
+        ]
+
+    def start_preview(self):
+        if self.preview_worker is not None:
+            return
+        input_path = self.ui.Input_Folder.text()
+        signals = self.selected_signals()
+        if not input_path or not signals:
+            QMessageBox.warning(self, "Thiếu thông tin", "Vui lòng chọn thư mục Input và tín hiệu.")
+            return
+        if not Path(input_path).is_dir():
+            QMessageBox.critical(self, "Lỗi", "❌ Thư mục Input không tồn tại.")
+            return
+
+        # Xem trước tín hiệu đầu tiên đang được chọn
+        self.preview_worker = PreviewWorker(input_path, self.ui.Preview_file.currentText(), signals[0], parent=self)
+        self.preview_worker.listed.connect(self.preview_listed)
+        self.preview_worker.loaded.connect(self.preview_loaded)
+        self.preview_worker.failed.connect(self.processing_failed)
+        self.preview_worker.finished.connect(self.preview_finished)
+        self.ui.Preview_button.setEnabled(False)
+        self.ui.statusbar.showMessage(f"⏳ Đang tải xem trước \"{signals[0]}\"...")
+        self.preview_worker.start()
+
+    def preview_listed(self, file_names):
+        current = self.ui.Preview_file.currentText()
+        self.ui.Preview_file.clear()
+        self.ui.Preview_file.addItems(file_names)
+        if current in file_names:
+            self.ui.Preview_file.setCurrentText(current)
+
+    def preview_loaded(self, pyramid):
+        self.ui.Preview_file.setCurrentText(pyramid.file_name)
+        self.ui.Preview.set_pyramid(pyramid)
+        self.ui.statusbar.showMessage(f"👁 {pyramid.file_name}: {len(pyramid.times)} điểm, "
+                                      f"{pyramid.start:g} - {pyramid.end:g}")
+
+    def preview_finished(self):
+        self.preview_worker.deleteLater()
+        self.preview_worker = None
+        self.ui.Preview_button.setEnabled(True)
+
+    def select_time_range(self, start, end):
+        # Start/End Time là số nguyên không âm: làm tròn ra ngoài để giữ trọn vùng đã chọn
+        start_time = max(math.floor(start), 0)
+        end_time = max(math.ceil(end), start_time + 1)
+        self.ui.Input_Start_Time.setText(str(start_time))
+        self.ui.Input_End_Time.setText(str(end_time))
+        self.ui.statusbar.showMessage(f"⏱ Start Time = {start_time}, End Time = {end_time}")
+
     def start_processing(self):
+        if self.worker is not None:
+            return
+
         input_path = self.ui.Input_Folder.text()
         output_path = self.ui.Output_Folder.text()
         start_time = self.ui.Input_Start_Time.text()
         end_time = self.ui.Input_End_Time.text()
-        signal = self.ui.Signal.currentText()
+        signals = self.selected_signals()
 
         # Kiểm tra đầu vào
-        if not input_path or not output_path or not start_time or not end_time:
+        if not input_path or not output_path or not start_time or not end_time or not signals:
             QMessageBox.warning(self, "Thiếu thông tin", "Vui lòng nhập đầy đủ thông tin.")
             return
 
         if not Path(input_path).is_dir():
             QMessageBox.critical(self, "Lỗi", "❌ Thư mục Input không tồn tại.")
             return
-        try:
-            run_processing(input_path, output_path, signal, start_time, end_time)
+
+        self.worker = ProcessingWorker(
+            input_path, output_path, signals, start_time, end_time,
+            report_stages=self.ui.Report_checkbox.isChecked(),
+            profile=self.ui.Profile_checkbox.isChecked(),
+            incremental=self.ui.Incremental_checkbox.isChecked(),
+            watch=self.ui.Watch_checkbox.isChecked(),
+            output_format=self.ui.Output_format.currentText(),
+            compare=self.ui.Compare_checkbox.isChecked(),
+            parent=self,
+        )
+        self.worker.progress.connect(self.show_progress)
+        self.worker.completed.connect(self.processing_completed)
+        self.worker.failed.connect(self.processing_failed)
+        self.worker.finished.connect(self.processing_finished)
+
+        self.ui.Start_button.setEnabled(False)
+        self.ui.Cancel_button.setEnabled(True)
+        self.ui.statusbar.showMessage("👀 Đang theo dõi thư mục..." if self.worker.watch else "⏳ Đang xử lý...")
+        self.worker.start()
+
+    def cancel_processing(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.ui.Cancel_button.setEnabled(False)
+            self.ui.statusbar.showMessage("⏹ Đang dừng sau file hiện tại...")
+
+    def show_progress(self, done, total, file_name, files_per_s, mb_per_s, elapsed):
+        self.ui.statusbar.showMessage(
+            f"{done}/{total} file | {file_name} | {files_per_s:.2f} file/s | "
+            f"{mb_per_s:.1f} MB/s | {elapsed:.1f} s"
+        )
+
+    def processing_completed(self, cancelled):
+        if cancelled:
+            QMessageBox.information(self, "Đã dừng", "⏹ Đã dừng xử lý, summary gồm các file đã hoàn tất.")
+        else:
             QMessageBox.information(self, "Thành công", "✅ Xử lý hoàn tất!")
-        except Exception as error:
-            QMessageBox.critical(self, "⚠ Warning", f"❌ Error:\n{str(error)}")
-        finally:
-            self.ui.Start_button.setEnabled(True)        
+
+    def processing_failed(self, message):
+        QMessageBox.critical(self, "⚠ Warning", f"❌ Error:\n{message}")
+
+    def processing_finished(self):
+        self.worker.deleteLater()
+        self.worker = None
+        self.ui.Start_button.setEnabled(True)
+        self.ui.Cancel_button.setEnabled(False)
+
+    def closeEvent(self, event):
+        # Dừng luồng xử lý trước khi đóng cửa sổ
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        if self.preview_worker is not None:
+            self.preview_worker.wait()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
+    # Cần cho ProcessPoolExecutor khi chạy bản build PyInstaller trên Windows
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+    # --startup-time: chỉ đo thời gian khởi động rồi thoát
+    QTimer.singleShot(0, lambda: window.window_shown(measure_only="--startup-time" in sys.argv))
     sys.exit(app.exec_())
@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+# Thư mục con trong output chứa manifest và ảnh biểu đồ của chế độ incremental
+MANIFEST_DIR = ".incremental"
+
+class Manifest:
+    """Ghi nhớ file input nào đã được xử lý với tín hiệu và khoảng thời gian nào.
+
+    Mỗi mục (theo đường dẫn file input) lưu kích thước, mtime, danh sách
+    tín hiệu, khoảng thời gian, ngưỡng thống kê cùng tên file CSV output, ảnh
+    biểu đồ và thống kê đã lưu.
+    File chỉ cần xử lý lại khi một trong các thông tin đó thay đổi hoặc output
+    không còn.
+    """
+
+    def __init__(self, output_folder: Path):
+        self.output_folder = Path(output_folder)
+        self.folder = self.output_folder / MANIFEST_DIR
+        self.path = self.folder / "manifest.json"
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def key(self, file_path: Path) -> str:
+        return str(file_path.resolve())
+
+    def is_fresh(self, file_path: Path, signals, start, end, thresholds=None, output_format="csv",
+                 precision="float64") -> bool:
+        entry = self.entries.get(self.key(file_path))
+        if entry is None:
+            return False
+        stat = file_path.stat()
+        if (entry["size"], entry["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            return False
+        if entry["signals"] != list(signals) or (entry["start"], entry["end"]) != (start, end):
+            return False
+        if entry.get("thresholds") != (thresholds or {}) or entry.get("format", "csv") != output_format:
+            return False
+        if entry.get("precision", "float64") != precision:
+            return False
+        if entry["csv"] is None:
+            # Lần trước không có dòng nào trong khoảng thời gian
+            return True
+        return (self.output_folder / entry["csv"]).exists() and self.folder.joinpath(entry["chart"]).exists()
+
+    def chart_path(self, file_path: Path):
+        # Ảnh biểu đồ đã lưu của file, None nếu file không có dữ liệu
+        entry = self.entries.get(self.key(file_path))
+        if entry is None or entry["csv"] is None:
+            return None
+        return self.folder / entry["chart"]
+
+    def stats(self, file_path: Path) -> dict:
+        # Thống kê đã lưu của file ({} với manifest cũ chưa có thống kê)
+        entry = self.entries.get(self.key(file_path))
+        return (entry or {}).get("stats") or {}
+
+    def charts_folder(self) -> Path:
+        # Thư mục chứa ảnh biểu đồ đã lưu, run_processing ghi ảnh thẳng vào đây
+        folder = self.folder / "charts"
+        folder.mkdir(parents=True, exist_ok=True)
+        return folder
+
+    def record(self, file_path: Path, signals, start, end, chart_png=None, thresholds=None, stats=None,
+               output_format="csv", output_name=None, precision="float64"):
+        """Ghi nhận file vừa xử lý xong; chart_png = None nếu không có dữ liệu.
+
+        chart_png là nội dung PNG hoặc đường dẫn ảnh (ảnh nằm ngoài thư mục
+        charts thì được chép vào). output_name là tên file output đã ghi (mặc
+        định <tên file>.csv).
+        """
+        stat = file_path.stat()
+        entry = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "signals": list(signals),
+            "start": start,
+            "end": end,
+            "thresholds": thresholds or {},
+            "format": output_format,
+            "precision": precision,
+            "csv": None,
+            "chart": None,
+            "stats": stats or {},
+        }
+        if chart_png is not None:
+            chart = Path("charts") / f"{file_path.stem}.png"
+            target = self.charts_folder() / chart.name
+            if not isinstance(chart_png, Path):
+                target.write_bytes(chart_png)
+            elif chart_png.resolve() != target.resolve():
+                shutil.copyfile(chart_png, target)
+            entry["csv"] = output_name or f"{file_path.stem}.csv"
+            entry["chart"] = chart.as_posix()
+        self.entries[self.key(file_path)] = entry
+
+    def prune(self, file_paths) -> bool:
+        # Bỏ các mục của file không còn trong input, trả về True nếu có thay đổi
+        keep = {self.key(file_path) for file_path in file_paths}
+        removed = [key for key in self.entries if key not in keep]
+        for key in removed:
+            entry = self.entries.pop(key)
+            if entry["chart"]:
+                try:
+                    (self.folder / entry["chart"]).unlink()
+                except OSError:
+                    pass
+        return bool(removed)
+
+    def save(self):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
@@ -0,0 +1,185 @@
+import math
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import funtion_process as fp
+from log_cache import LogCache
+from time_index import is_sorted
+
+# Mức thấp nhất của pyramid: mỗi nhóm PYRAMID_LEAF_ROWS dòng liên tiếp
+PYRAMID_LEAF_ROWS = 16
+# Mỗi mức trên gộp PYRAMID_FANOUT nhóm của mức dưới thành một nhóm
+PYRAMID_FANOUT = 8
+# Số điểm tối đa trả về cho mỗi lần vẽ (mặc định, khi không biết độ rộng vùng vẽ)
+PREVIEW_MAX_POINTS = 4000
+
+def group_extremes(low, high, size):
+    """Chia low/high thành các nhóm size phần tử liên tiếp, trả về vị trí
+    (trong mảng) của giá trị nhỏ nhất của low và lớn nhất của high mỗi nhóm."""
+    n = len(low)
+    groups = -(-n // size)
+    pad = groups * size - n
+    if pad:
+        low = np.concatenate([low, np.full(pad, np.inf)])
+        high = np.concatenate([high, np.full(pad, -np.inf)])
+    offsets = np.arange(groups) * size
+    min_pos = low.reshape(groups, size).argmin(axis=1) + offsets
+    max_pos = high.reshape(groups, size).argmax(axis=1) + offsets
+    return np.minimum(min_pos, n - 1), np.minimum(max_pos, n - 1)
+
+def build_levels(values, leaf_rows=PYRAMID_LEAF_ROWS, fanout=PYRAMID_FANOUT,
+                 chunksize=fp.READ_CHUNK_ROWS) -> list:
+    """Tạo pyramid min/max: danh sách mức, mỗi mức là (min_row, max_row) với
+    min_row[i]/max_row[i] là số thứ tự dòng có giá trị nhỏ nhất/lớn nhất của
+    nhóm i. Mức k có nhóm dài leaf_rows * fanout**k dòng.
+
+    Mức thấp nhất được tính theo từng khối dòng (không sao chép cả cột); mỗi
+    mức trên chỉ gộp mức ngay dưới nên tổng chi phí là O(số dòng). NaN bị bỏ
+    qua (nhóm toàn NaN trỏ tới một dòng NaN, tạo khoảng trống khi vẽ).
+    """
+    n = len(values)
+    block = max(chunksize // leaf_rows, 1) * leaf_rows
+    min_parts, max_parts = [], []
+    for first in range(0, n, block):
+        chunk = np.asarray(values[first:first + block], dtype=np.float64)
+        missing = np.isnan(chunk)
+        min_pos, max_pos = group_extremes(np.where(missing, np.inf, chunk), np.where(missing, -np.inf, chunk),
+                                          leaf_rows)
+        min_parts.append(min_pos + first)
+        max_parts.append(max_pos + first)
+    levels = [(np.concatenate(min_parts), np.concatenate(max_parts))] if n else []
+
+    while levels and len(levels[-1][0]) > 1:
+        min_row, max_row = levels[-1]
+        low = np.asarray(values[min_row], dtype=np.float64)
+        high = np.asarray(values[max_row], dtype=np.float64)
+        min_pos, max_pos = group_extremes(np.where(np.isnan(low), np.inf, low),
+                                          np.where(np.isnan(high), -np.inf, high), fanout)
+        levels.append((min_row[min_pos], max_row[max_pos]))
+    return levels
+
+class SignalPyramid:
+    """Tóm tắt nhiều mức (min/max) của một tín hiệu để xem trước nhanh.
+
+    view(start, end, max_points) chỉ lấy đúng mức chi tiết cần cho khoảng
+    đang xem: khoảng hẹp trả về dữ liệu gốc, khoảng rộng trả về điểm
+    nhỏ nhất/lớn nhất của từng nhóm ở mức thô nhất vẫn đủ max_points điểm,
+    nên số điểm phải vẽ không phụ thuộc vào độ dài file. times phải tăng dần.
+    """
+
+    def __init__(self, times, values, levels, leaf_rows=PYRAMID_LEAF_ROWS, fanout=PYRAMID_FANOUT,
+                 name="", file_name=""):
+        self.times = times
+        self.values = values
+        self.levels = levels
+        self.leaf_rows = leaf_rows
+        self.fanout = fanout
+        self.name = name
+        self.file_name = file_name
+
+    @property
+    def start(self):
+        return float(self.times[0])
+
+    @property
+    def end(self):
+        return float(self.times[-1])
+
+    def group_rows(self, level) -> int:
+        # Số dòng của mỗi nhóm ở mức level
+        return self.leaf_rows * self.fanout ** level
+
+    def view(self, start, end, max_points=PREVIEW_MAX_POINTS):
+        """Trả về (x, y, level) cho khoảng [start, end]; level = -1 là dữ liệu gốc."""
+        first = int(np.searchsorted(self.times, start, side="left"))
+        last = int(np.searchsorted(self.times, end, side="right"))
+        # Lấy thêm một điểm mỗi bên để đường vẽ chạm tới mép vùng xem
+        first, last = max(first - 1, 0), min(last + 1, len(self.times))
+        rows = last - first
+        if rows <= max_points or not self.levels:
+            return (np.asarray(self.times[first:last], dtype=np.float64),
+                    np.asarray(self.values[first:last], dtype=np.float64), -1)
+
+        # Mức chi tiết nhất có 2 điểm mỗi nhóm vẫn không vượt quá max_points
+        ratio = 2 * rows / (max_points * self.leaf_rows)
+        level = max(math.ceil(math.log(ratio, self.fanout)), 0) if ratio > 1 else 0
+        level = min(level, len(self.levels) - 1)
+        size = self.group_rows(level)
+        min_row, max_row = self.levels[level]
+        first_group, last_group = first // size, (last - 1) // size + 1
+        picked = np.concatenate([min_row[first_group:last_group], max_row[first_group:last_group],
+                                 [first, last - 1]])
+        picked = np.unique(picked[(picked >= first) & (picked < last)])
+        return (np.asarray(self.times[picked], dtype=np.float64),
+                np.asarray(self.values[picked], dtype=np.float64), level)
+
+def pyramid_key(pos) -> str:
+    return f"pyramid_{pos}"
+
+def load_levels(file_path: Path, names, pos, values, cache: LogCache, info: dict) -> list:
+    # Lấy các mức pyramid từ cache, chưa có (hoặc khác tham số) thì tạo và lưu lại
+    saved = info.get(pyramid_key(pos))
+    if saved and saved["leaf_rows"] == PYRAMID_LEAF_ROWS and saved["fanout"] == PYRAMID_FANOUT:
+        keys = [f"{pyramid_key(pos)}_{level}_{part}" for level in range(saved["levels"]) for part in ("min", "max")]
+        arrays = cache.load(file_path, names, keys)
+        if len(arrays) == len(keys):
+            return [(arrays[keys[2 * level]], arrays[keys[2 * level + 1]]) for level in range(saved["levels"])]
+
+    levels = build_levels(values)
+    arrays = {}
+    for level, (min_row, max_row) in enumerate(levels):
+        arrays[f"{pyramid_key(pos)}_{level}_min"] = min_row
+        arrays[f"{pyramid_key(pos)}_{level}_max"] = max_row
+    cache.store(file_path, names, arrays, info={
+        pyramid_key(pos): {"leaf_rows": PYRAMID_LEAF_ROWS, "fanout": PYRAMID_FANOUT, "levels": len(levels)},
+    })
+    return levels
+
+def load_pyramid(file_path: Path, signal_key, use_cache=True, cache_dir=None,
+                 chunksize=fp.READ_CHUNK_ROWS) -> SignalPyramid:
+    """Đọc cột thời gian và một tín hiệu (prefix signal_key) của file, trả về
+    SignalPyramid để xem trước.
+
+    Với cache (LogCache), các cột được đọc bằng memory-map và pyramid được
+    lưu cùng mục cache của file nên lần mở sau không cần parse lại file. File
+    có cột thời gian không tăng dần được sắp xếp lại trong bộ nhớ và pyramid
+    không được lưu vào cache.
+    """
+    names = fp.read_header(file_path)
+    signal_col = fp.resolve_signal_columns(names, [signal_key], file_path.name)[0]
+    pos = names.index(signal_col)
+    positions = sorted({0, pos})
+    cache = LogCache(cache_dir) if use_cache else None
+
+    arrays, info = {}, {}
+    if cache is not None:
+        arrays = cache.load(file_path, names, positions)
+        info = cache.load_info(file_path, names)
+    missing = [p for p in positions if p not in arrays]
+    if missing:
+        parsed = fp.read_columns(file_path, missing, chunksize)
+        if cache is not None:
+            new_info = {"time_sorted": is_sorted(parsed[0])} if 0 in parsed else None
+            cache.store(file_path, names, parsed, new_info)
+            info.update(new_info or {})
+        arrays.update(parsed)
+
+    times, values = arrays[0], arrays[pos]
+    # Cột không phải số (cache không lưu được) được đổi sang số, giá trị lỗi thành NaN
+    if times.dtype.kind not in "biuf":
+        times = pd.to_numeric(times, errors="coerce").astype(np.float64)
+    if values.dtype.kind not in "biuf":
+        values = pd.to_numeric(values, errors="coerce").astype(np.float64)
+    if len(times) < 2:
+        raise ValueError(f"⚠ {file_path.name}: Không đủ dữ liệu để xem trước.")
+
+    sorted_times = info["time_sorted"] if "time_sorted" in info else is_sorted(times)
+    if not sorted_times:
+        order = np.argsort(times, kind="stable")
+        times, values = times[order], values[order]
+        levels = build_levels(values, chunksize=chunksize)
+    elif cache is not None:
+        levels = load_levels(file_path, names, pos, values, cache, info)
+    else:
+        levels = build_levels(values, chunksize=chunksize)
+    return SignalPyramid(times, values, levels, name=signal_col, file_name=file_path.name)
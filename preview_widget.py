@@ -0,0 +1,173 @@
+import math
+from PyQt5.QtCore import QPointF, QRectF, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QPainter, QPen, QPolygonF
+from PyQt5.QtWidgets import QWidget
+
+# Lề vùng vẽ (trái, trên, phải, dưới) tính theo pixel
+PLOT_MARGINS = (52, 20, 10, 22)
+# Mỗi nấc lăn chuột phóng to/thu nhỏ theo hệ số này
+ZOOM_STEP = 0.8
+# Kéo ngắn hơn số pixel này thì không tính là chọn vùng
+MIN_SELECTION_PX = 4
+
+def format_number(value) -> str:
+    return f"{value:.6g}"
+
+class PreviewPlot(QWidget):
+    """Vùng xem trước một tín hiệu, vẽ trực tiếp bằng QPainter.
+
+    Dữ liệu lấy từ SignalPyramid (preview.py): mỗi lần phóng to/kéo chỉ hỏi
+    pyramid đúng khoảng đang xem với số điểm khoảng hai lần độ rộng vùng vẽ,
+    nên file nhiều triệu dòng vẫn vẽ tức thì. Lăn chuột: phóng to/thu nhỏ
+    quanh con trỏ; kéo chuột phải: dịch; kéo chuột trái: chọn khoảng thời
+    gian (phát region_selected); nhấp đúp: xem toàn bộ.
+    """
+
+    region_selected = pyqtSignal(float, float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pyramid = None
+        self.view_start = 0.0
+        self.view_end = 1.0
+        self.points = []
+        self.level = -1
+        self.y_range = (0.0, 1.0)
+        self.drag_origin = None
+        self.drag_mode = None
+        self.drag_view = None
+        # Khoảng thời gian đang chọn (giữ theo thời gian nên vẫn đúng khi phóng to/dịch)
+        self.selection = None
+        self.setFocusPolicy(Qt.WheelFocus)
+
+    def set_pyramid(self, pyramid):
+        self.pyramid = pyramid
+        self.selection = None
+        self.show_range(pyramid.start, pyramid.end)
+
+    def plot_rect(self) -> QRectF:
+        left, top, right, bottom = PLOT_MARGINS
+        return QRectF(left, top, max(self.width() - left - right, 1), max(self.height() - top - bottom, 1))
+
+    def show_range(self, start, end):
+        # Giữ khoảng xem trong phạm vi dữ liệu, rồi lấy điểm vẽ từ pyramid
+        if self.pyramid is None:
+            return
+        full = self.pyramid.end - self.pyramid.start
+        span = min(max(end - start, 1e-9), full) if full > 0 else 1.0
+        start = min(max(start, self.pyramid.start), self.pyramid.end - span)
+        self.view_start, self.view_end = start, start + span
+
+        x, y, self.level = self.pyramid.view(self.view_start, self.view_end, 2 * int(self.plot_rect().width()))
+        self.points = list(zip(x.tolist(), y.tolist()))
+        finite = [value for _, value in self.points if math.isfinite(value)]
+        low, high = (min(finite), max(finite)) if finite else (0.0, 1.0)
+        if high == low:
+            low, high = low - 0.5, high + 0.5
+        pad = (high - low) * 0.05
+        self.y_range = (low - pad, high + pad)
+        self.update()
+
+    def time_at(self, px) -> float:
+        rect = self.plot_rect()
+        fraction = min(max((px - rect.left()) / rect.width(), 0.0), 1.0)
+        return self.view_start + fraction * (self.view_end - self.view_start)
+
+    def x_at(self, t) -> float:
+        rect = self.plot_rect()
+        return rect.left() + (t - self.view_start) / (self.view_end - self.view_start) * rect.width()
+
+    def to_screen(self, t, value) -> QPointF:
+        rect = self.plot_rect()
+        low, high = self.y_range
+        return QPointF(self.x_at(t), rect.bottom() - (value - low) / (high - low) * rect.height())
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(245, 245, 245))
+        rect = self.plot_rect()
+        painter.setPen(QPen(QColor(120, 120, 120), 1))
+        painter.drawRect(rect)
+        painter.setFont(QFont(self.font().family(), 8))
+
+        if self.pyramid is None:
+            painter.drawText(rect, Qt.AlignCenter, "Chọn file và bấm Preview")
+            return
+
+        # Đường tín hiệu, ngắt tại các giá trị NaN
+        painter.setClipRect(rect)
+        painter.setPen(QPen(QColor("#1f77b4"), 1))
+        segment = QPolygonF()
+        for t, value in self.points:
+            if math.isfinite(value):
+                segment.append(self.to_screen(t, value))
+            elif segment.size():
+                painter.drawPolyline(segment)
+                segment = QPolygonF()
+        if segment.size():
+            painter.drawPolyline(segment)
+
+        if self.selection is not None:
+            left, right = sorted(self.x_at(t) for t in self.selection)
+            painter.fillRect(QRectF(left, rect.top(), right - left, rect.height()), QColor(255, 165, 0, 70))
+        painter.setClipping(False)
+
+        # Nhãn: giá trị lớn/nhỏ nhất, thời gian hai mép và mức chi tiết đang dùng
+        painter.setPen(QColor(40, 40, 40))
+        low, high = self.y_range
+        painter.drawText(QRectF(0, rect.top() - 6, rect.left() - 4, 14), Qt.AlignRight, format_number(high))
+        painter.drawText(QRectF(0, rect.bottom() - 8, rect.left() - 4, 14), Qt.AlignRight, format_number(low))
+        painter.drawText(QRectF(rect.left(), rect.bottom() + 3, rect.width(), 16), Qt.AlignLeft,
+                         format_number(self.view_start))
+        painter.drawText(QRectF(rect.left(), rect.bottom() + 3, rect.width(), 16), Qt.AlignRight,
+                         format_number(self.view_end))
+        detail = "dữ liệu gốc" if self.level < 0 else f"mức {self.level}"
+        painter.drawText(QRectF(rect.left(), 2, rect.width(), 16), Qt.AlignLeft,
+                         f"{self.pyramid.file_name} | {self.pyramid.name} | {detail}, {len(self.points)} điểm")
+
+    def wheelEvent(self, event):
+        if self.pyramid is None:
+            return
+        # Mỗi nấc lăn (120 đơn vị) phóng to/thu nhỏ một lần ZOOM_STEP
+        factor = ZOOM_STEP ** (event.angleDelta().y() / 120)
+        anchor = self.time_at(event.pos().x())
+        self.show_range(anchor - (anchor - self.view_start) * factor, anchor + (self.view_end - anchor) * factor)
+
+    def mousePressEvent(self, event):
+        if self.pyramid is None:
+            return
+        self.drag_origin = event.pos().x()
+        if event.button() == Qt.LeftButton:
+            self.drag_mode = "select"
+            self.selection = (self.time_at(self.drag_origin),) * 2
+        elif event.button() == Qt.RightButton:
+            self.drag_mode = "pan"
+            self.drag_view = (self.view_start, self.view_end)
+
+    def mouseMoveEvent(self, event):
+        if self.drag_mode == "select":
+            self.selection = (self.selection[0], self.time_at(event.pos().x()))
+            self.update()
+        elif self.drag_mode == "pan":
+            start, end = self.drag_view
+            shift = (self.drag_origin - event.pos().x()) / self.plot_rect().width() * (end - start)
+            self.show_range(start + shift, end + shift)
+
+    def mouseReleaseEvent(self, event):
+        if self.drag_mode == "select":
+            start, end = sorted(self.selection)
+            if self.x_at(end) - self.x_at(start) >= MIN_SELECTION_PX:
+                self.region_selected.emit(start, end)
+            else:
+                self.selection = None
+            self.update()
+        self.drag_mode = None
+
+    def mouseDoubleClickEvent(self, event):
+        if self.pyramid is not None:
+            self.selection = None
+            self.show_range(self.pyramid.start, self.pyramid.end)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.show_range(self.view_start, self.view_end)
@@ -0,0 +1,139 @@
+import math
+import numpy as np
+import pandas as pd
+
+# Ngưỡng mặc định để đếm số lần cắt ngưỡng, theo prefix tín hiệu. Các tín
+# hiệu khác (vNE, bvNSET0, vQLDAC) không đếm cắt ngưỡng trừ khi được truyền
+# thresholds (cli.py --threshold PREFIX=VALUE hoặc "thresholds" trong file job)
+STAT_THRESHOLDS = {"vSWMONT": 0.5}
+# Tín hiệu dạng công tắc (0/1): đếm số lần bật/tắt và tổng thời gian bật/tắt
+SWITCH_SIGNALS = {"vSWMONT"}
+
+STAT_FIELDS = ["rows", "min", "max", "mean", "rms", "time_at_max", "threshold", "crossings",
+               "on_edges", "off_edges", "on_time", "off_time"]
+
+class SignalStats:
+    """Tính thống kê của một tín hiệu theo từng khối dữ liệu.
+
+    Mỗi lần update() chỉ giữ lại vài giá trị tích lũy (tổng, tổng bình phương,
+    min/max, giá trị và thời gian cuối của khối trước) nên dùng được cho log
+    lớn tùy ý. Giá trị NaN bị bỏ qua. Với tín hiệu công tắc (switch=True),
+    trạng thái "bật" là giá trị > threshold; thời gian bật/tắt tính theo kiểu
+    giữ mẫu (mỗi mẫu giữ trạng thái tới mẫu kế tiếp), cùng đơn vị cột thời gian.
+    """
+
+    def __init__(self, threshold=None, switch=False):
+        if switch and threshold is None:
+            threshold = 0.5
+        self.threshold = threshold
+        self.switch = switch
+        self.rows = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.time_at_max = None
+        self.crossings = 0
+        self.on_edges = 0
+        self.off_edges = 0
+        self.on_time = 0.0
+        self.off_time = 0.0
+        self.last_time = None
+        self.last_above = None
+
+    def update(self, times, values):
+        times = np.asarray(times, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        if not valid.all():
+            times, values = times[valid], values[valid]
+        if not len(values):
+            return
+
+        self.rows += len(values)
+        self.total += float(values.sum())
+        self.total_sq += float(np.dot(values, values))
+        self.min = min(self.min, float(values.min()))
+        k = int(values.argmax())
+        if values[k] > self.max:
+            self.max = float(values[k])
+            self.time_at_max = float(times[k])
+
+        if self.threshold is None:
+            return
+        above = values > self.threshold
+        # Nối với mẫu cuối của khối trước để không bỏ sót cạnh ở ranh giới khối
+        if self.last_above is not None:
+            above_all = np.concatenate(([self.last_above], above))
+            times_all = np.concatenate(([self.last_time], times))
+        else:
+            above_all, times_all = above, times
+        change = above_all[1:] != above_all[:-1]
+        self.crossings += int(change.sum())
+        if self.switch:
+            rising = int((change & above_all[1:]).sum())
+            self.on_edges += rising
+            self.off_edges += int(change.sum()) - rising
+            held = np.diff(times_all)
+            self.on_time += float(held[above_all[:-1]].sum())
+            self.off_time += float(held[~above_all[:-1]].sum())
+        self.last_above = bool(above[-1])
+        self.last_time = float(times[-1])
+
+    def result(self) -> dict:
+        # Các giá trị là kiểu Python thường để ghi được ra JSON/Excel
+        empty = self.rows == 0
+        stats = {
+            "rows": self.rows,
+            "min": None if empty else self.min,
+            "max": None if empty else self.max,
+            "mean": None if empty else self.total / self.rows,
+            "rms": None if empty else math.sqrt(self.total_sq / self.rows),
+            "time_at_max": self.time_at_max,
+            "threshold": self.threshold,
+            "crossings": None if self.threshold is None else self.crossings,
+            "on_edges": None,
+            "off_edges": None,
+            "on_time": None,
+            "off_time": None,
+        }
+        if self.switch:
+            stats.update(on_edges=self.on_edges, off_edges=self.off_edges, on_time=self.on_time,
+                         off_time=self.off_time)
+        return stats
+
+def signal_prefix(column: str) -> str:
+    return column.split("\\")[0].strip()
+
+class WindowStats:
+    """Thống kê các tín hiệu của một khoảng thời gian, nhận dữ liệu theo từng
+    khối ngay trong lúc đọc file (xem read_window_csv).
+
+    Mỗi khối là một DataFrame với cột thời gian đứng đầu, các cột còn lại là
+    tín hiệu; chỉ khối đó được đổi sang số (giá trị không phải số thành NaN),
+    không cần giữ hay duyệt lại cả bảng đã lọc. thresholds: {prefix: ngưỡng}
+    bổ sung/ghi đè STAT_THRESHOLDS.
+    """
+
+    def __init__(self, thresholds=None):
+        self.thresholds = {**STAT_THRESHOLDS, **(thresholds or {})}
+        self.accumulators = {}
+
+    def accumulator(self, col) -> SignalStats:
+        if col not in self.accumulators:
+            prefix = signal_prefix(col)
+            self.accumulators[col] = SignalStats(self.thresholds.get(prefix), prefix in SWITCH_SIGNALS)
+        return self.accumulators[col]
+
+    def reset(self):
+        # Bỏ các khối đã nhận (vd khi phải đọc lại file từ đầu)
+        self.accumulators = {}
+
+    def update(self, piece):
+        times = pd.to_numeric(piece.iloc[:, 0], errors="coerce").to_numpy()
+        for col in piece.columns[1:]:
+            self.accumulator(col).update(times, pd.to_numeric(piece[col], errors="coerce").to_numpy())
+
+    def result(self, signal_cols) -> dict:
+        # {tên cột: dict theo STAT_FIELDS}
+        return {col: self.accumulator(col).result() for col in signal_cols}
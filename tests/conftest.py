@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Các module của dự án nằm ngay thư mục gốc (không phải package)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
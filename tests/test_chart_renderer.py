@@ -0,0 +1,64 @@
+import ctypes
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import funtion_process as fp
+from benchmark import TIME_HEADER
+from chart_renderer import ChartRenderer
+
+# Số vòng vẽ lặp lại và RSS được phép giữ lại (MB) so với trước lần vẽ đầu tiên
+RENDER_ROUNDS = 3
+RENDER_RETAINED_MB = 100
+
+def current_rss_mb():
+    # RSS hiện tại (MB), None nếu không đo được. Với glibc, bộ nhớ đã giải
+    # phóng được trả lại hệ điều hành trước khi đo
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def test_repeated_renders_release_memory():
+    # Vẽ lặp lại biểu đồ 1, 2, 4 tín hiệu (số trục thay đổi, dữ liệu nhiễu):
+    # RSS phải gần như trở về mức trước khi vẽ, không tăng theo số vòng
+    rng = np.random.default_rng(0)
+    rows = 20_000
+    df = pd.DataFrame({TIME_HEADER: np.arange(rows)})
+    columns = [f"s{i}" for i in range(4)]
+    for col in columns:
+        df[col] = rng.normal(0, 1, rows)
+    before = current_rss_mb()
+    if before is None:
+        pytest.skip("không đo được RSS")
+    measured = []
+    for _ in range(RENDER_ROUNDS):
+        for count in (1, 2, 4):
+            fp.create_plot(df, TIME_HEADER, columns[:count], "check")
+        measured.append(current_rss_mb())
+    assert max(measured) - before <= RENDER_RETAINED_MB, f"RSS trước khi vẽ {before:.0f} MB, sau mỗi vòng {measured}"
+
+def test_text_signal_does_not_break_later_charts():
+    # Cột tín hiệu dạng chữ ("0"/"1", có ô "ERR") vẫn vẽ được, và các biểu đồ
+    # vẽ sau trong cùng luồng không bị ảnh hưởng
+    rows = 1_000
+    numeric = pd.DataFrame({TIME_HEADER: np.arange(rows), "s": np.sin(np.arange(rows) / 50)})
+    switch = (np.arange(rows) // 100 % 2).astype(str).astype(object)
+    text = pd.DataFrame({TIME_HEADER: np.arange(rows), "s": switch})
+    with_error = text.copy()
+    with_error.loc[500, "s"] = "ERR"
+    for df in (numeric, text, with_error, numeric):
+        assert fp.create_plot(df, TIME_HEADER, ["s"], "check").startswith(b"\x89PNG")
+
+def test_failed_render_resets_figure():
+    renderer = ChartRenderer((4, 3), 50, ("#1f77b4",))
+    x = np.arange(10)
+    with pytest.raises(Exception):
+        renderer.render([(x, np.array(["a"] * 9 + [1.5], dtype=object), "bad")], "bad")
+    assert renderer.chart is None
+    assert renderer.render([(x, np.sin(x), "ok")], "ok").startswith(b"\x89PNG")
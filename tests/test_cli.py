@@ -0,0 +1,12 @@
+import json
+import pytest
+from cli import EXIT_USAGE, main
+
+JOB = {"input": "in", "output": "out", "signals": ["Actual Speed"], "start": 0, "end": 1000}
+
+@pytest.mark.parametrize("defaults", [["Actual Speed"], {"workers": "4"}, {"workers": 2.5}, {"workers": True}])
+def test_invalid_defaults_are_usage_errors(tmp_path, capsys, defaults):
+    job_file = tmp_path / "jobs.json"
+    job_file.write_text(json.dumps({"defaults": defaults, "jobs": [JOB]}), encoding="utf-8")
+    assert main(["jobs", str(job_file)]) == EXIT_USAGE
+    assert "defaults" in capsys.readouterr().out
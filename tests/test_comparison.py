@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmark import CHANNEL_SUFFIX, TIME_HEADER
+from comparison import run_comparison
+
+def write_logs(folder, times, count=2):
+    folder.mkdir()
+    for i in range(count):
+        pd.DataFrame({TIME_HEADER: times, "vNE" + CHANNEL_SUFFIX: np.sin(np.asarray(times) / 1000 + i)}).to_csv(
+            folder / f"log_{i}.csv", index=False)
+    return folder
+
+def test_repeated_timestamps_use_positive_step(tmp_path):
+    # Log ghi hai dòng cho mỗi mốc thời gian (bước 10 ms): lưới phải có bước
+    # 10, không chia cho bước 0
+    times = np.arange(20_000) // 2 * 10
+    input_dir = write_logs(tmp_path / "input", times)
+    outputs = run_comparison(input_dir, tmp_path, ["Actual Speed"], "0", str(times[-1]), use_cache=False)
+    grid = pd.read_csv(outputs["vNE"]["csv"], nrows=2).iloc[:, 0]
+    assert grid[1] - grid[0] == 10
+
+def test_equal_timestamps_need_explicit_step(tmp_path):
+    input_dir = write_logs(tmp_path / "input", [5] * 100)
+    with pytest.raises(ValueError, match="bước lưới"):
+        run_comparison(input_dir, tmp_path, ["Actual Speed"], "0", "10", use_cache=False)
+
+def test_comma_in_file_name_keeps_columns(tmp_path):
+    # Tên file có dấu phẩy: tiêu đề phải có đúng một cột cho mỗi file
+    times = np.arange(5_000) * 10
+    input_dir = write_logs(tmp_path / "input", times)
+    (input_dir / "log_1.csv").rename(input_dir / "run 1, motor.csv")
+    outputs = run_comparison(input_dir, tmp_path, ["Actual Speed"], "0", str(times[-1]), use_cache=False)
+    result = pd.read_csv(outputs["vNE"]["csv"], encoding="utf-8-sig")
+    assert list(result.columns[1:]) == ["log_0", "run 1, motor"]
+    assert not result.iloc[:, 1:].isna().all().any()
@@ -0,0 +1,19 @@
+import numpy as np
+
+from funtion_process import decimate_minmax
+
+def test_spike_next_to_nan_is_kept():
+    y = np.zeros(1_000_000)
+    y[500_000] = np.nan
+    y[500_010] = 100.0
+    x = np.arange(len(y))
+    dx, dy = decimate_minmax(x, y, 1600)
+    assert np.nanmax(dy) == 100.0
+    assert 500_010 in dx
+
+def test_all_nan_bucket_leaves_gap():
+    y = np.arange(10_000, dtype=np.float64)
+    y[:100] = np.nan
+    dx, dy = decimate_minmax(np.arange(len(y)), y, 100)
+    assert np.isnan(dy[0])
+    assert dy[-1] == 9_999
@@ -0,0 +1,9 @@
+import numpy as np
+import pandas as pd
+from funtion_process import create_output_csv
+
+def test_csv_fast_keeps_small_values(tmp_path):
+    df = pd.DataFrame({"t": [0, 10, 20], "v": [1e-9, -2.5e-7, 123456.789]})
+    output_file = create_output_csv(tmp_path / "input" / "log.csv", df, tmp_path, "csv-fast")
+    written = pd.read_csv(output_file, encoding="utf-8-sig")
+    np.testing.assert_allclose(written["v"], df["v"], rtol=1e-8)
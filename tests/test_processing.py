@@ -0,0 +1,51 @@
+import json
+import threading
+from pathlib import Path
+import pandas as pd
+import funtion_process as fp
+from benchmark import generate_logs
+
+def test_cancel_keeps_running_files(tmp_path):
+    # Bấm Cancel khi chạy song song: mọi file đã ghi output (kể cả file đang
+    # chạy lúc hủy) phải có trong số file đã xử lý và trong manifest
+    files = generate_logs(tmp_path / "input", files=12, rows=50_000, columns=10)
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    cancel_event = threading.Event()
+    outcome = fp.run_processing(tmp_path / "input", output_dir, ["Actual Speed"], "0", str(10 ** 9), workers=2,
+                                progress_callback=lambda *_: cancel_event.set(), cancel_event=cancel_event,
+                                use_cache=False, incremental=True)
+    stems = {file_path.stem for file_path in files}
+    written = sorted(path.name for path in output_dir.rglob("*.csv") if path.stem in stems)
+    with open(next(output_dir.rglob("manifest.json")), encoding="utf-8") as f:
+        recorded = sorted(Path(key).name for key in json.load(f))
+    assert outcome["cancelled"]
+    assert len(written) == outcome["processed"]
+    assert written == recorded
+
+def test_text_cell_in_signal_with_warm_cache(tmp_path):
+    # Kênh vSWMONT có một ô "ERR": cả lần chạy đầu và lần chạy lại (cache đã
+    # có) đều phải xử lý được mọi file
+    files = generate_logs(tmp_path / "input", files=3, rows=20_000, columns=6)
+    for file_path in files:
+        df = pd.read_csv(file_path)
+        df[df.columns[4]] = df[df.columns[4]].astype(object)
+        df.loc[10_000, df.columns[4]] = "ERR"
+        df.to_csv(file_path, index=False)
+    for run in range(2):
+        output_dir = tmp_path / f"output_{run}"
+        output_dir.mkdir()
+        outcome = fp.run_processing(tmp_path / "input", output_dir, ["AC Switch", "Actual Speed"], "0", "15000",
+                                    workers=1, cache_dir=tmp_path / "cache")
+        assert outcome["processed"] == len(files) and not outcome["failed"]
+
+def test_profile_covers_file_processing(tmp_path):
+    # GUI chạy với workers=None: profile vẫn phải đo phần xử lý từng file chứ
+    # không chỉ tiến trình cha chờ kết quả
+    generate_logs(tmp_path / "input", files=3, rows=5_000, columns=6)
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    outcome = fp.run_processing(tmp_path / "input", output_dir, ["Actual Speed"], "0", str(10 ** 9), workers=None,
+                                use_cache=False, profile=True)
+    assert outcome["processed"] == 3
+    assert "(process_file)" in next(output_dir.rglob("profile.txt")).read_text(encoding="utf-8")
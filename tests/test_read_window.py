@@ -0,0 +1,107 @@
+import gzip
+import shutil
+import zipfile
+import numpy as np
+import pandas as pd
+import pytest
+import funtion_process as fp
+from archive_input import archive_members
+from benchmark import CHANNEL_SUFFIX, TIME_HEADER
+from log_cache import LogCache
+
+ROWS = 500_000
+WINDOW = (1000, 3000)
+SIGNAL_KEYS = ["vNE", "bvNSET0"]
+
+@pytest.fixture(scope="module")
+def blank_cell_log(tmp_path_factory):
+    # Kênh số nguyên có một ô trống gần cuối file: cả file đọc ra số thực.
+    # Kênh bật/tắt có một ô lỗi gần cuối file: cả file đọc ra chữ, cache không
+    # lưu được cột này nên các lần đọc hẹp sau phải nhảy giữa file
+    values = pd.Series(np.arange(ROWS) % 3000).astype("Int64")
+    values[ROWS - 10] = pd.NA
+    switch = pd.Series(np.arange(ROWS) // 500 % 2).astype(object)
+    switch[ROWS - 10] = "ERR"
+    path = tmp_path_factory.mktemp("logs") / "blank_cell.csv"
+    pd.DataFrame({
+        TIME_HEADER: np.arange(ROWS),
+        "vNE" + CHANNEL_SUFFIX: values,
+        "bvNSET0" + CHANNEL_SUFFIX: switch,
+    }).to_csv(path, index=False)
+    return path
+
+def reference_output(path, start, end, output_dir, precision) -> bytes:
+    # Cách đọc ban đầu: parse cả file rồi lọc, làm chuẩn để so sánh từng byte.
+    # float32: cột tín hiệu có mọi ô trong khoảng là số được đổi sang float32
+    df = pd.read_csv(path)
+    columns = [df.columns[0]] + [fp.find_column(df, key) for key in SIGNAL_KEYS]
+    df_filtered = df[columns][(df[columns[0]] >= start) & (df[columns[0]] <= end)]
+    if precision == "float32":
+        for col in columns[1:]:
+            numeric = pd.to_numeric(df_filtered[col], errors="coerce")
+            if not (numeric.isna() & df_filtered[col].notna()).any():
+                df_filtered[col] = numeric.astype(np.float32)
+    return fp.create_output_csv(path, df_filtered, output_dir).read_bytes()
+
+# Cách đọc cả file cảnh báo cột lẫn số và chữ, đúng như bản gốc
+@pytest.mark.filterwarnings("ignore::pandas.errors.DtypeWarning")
+@pytest.mark.parametrize("precision", fp.PRECISIONS)
+def test_window_matches_full_read_on_every_path(blank_cell_log, tmp_path, precision):
+    # File output của một khoảng hẹp phải giống hệt cách đọc cả file, dù đọc
+    # không cache, cache còn trống hay cache đã có cột (sau một lần đọc rộng)
+    expected = reference_output(blank_cell_log, *WINDOW, tmp_path, precision)
+    cache = LogCache(tmp_path / "cache")
+    reads = [
+        ("không cache", None, WINDOW),
+        ("cache trống", cache, WINDOW),
+        ("đọc rộng", cache, (0, 400_000)),
+        ("cache có cột", cache, WINDOW),
+    ]
+    for label, read_cache, (start, end) in reads:
+        df, _, _ = fp.read_signal_window(blank_cell_log, SIGNAL_KEYS, start, end, cache=read_cache,
+                                         precision=precision)
+        if (start, end) == WINDOW:
+            actual = fp.create_output_csv(blank_cell_log, df, tmp_path).read_bytes()
+            assert actual == expected, label
+
+def tripwire_log(folder, rows):
+    # Tín hiệu số thực, thêm một dòng có thời gian là chữ ở cuối file: dòng
+    # này chỉ gây lỗi nếu bị đọc tới
+    path = folder / "long.csv"
+    pd.DataFrame({TIME_HEADER: np.arange(rows), "vNE" + CHANNEL_SUFFIX: np.sin(np.arange(rows) / 100)}).to_csv(
+        path, index=False)
+    with open(path, "a") as f:
+        f.write("end,0\n")
+    return path
+
+@pytest.mark.parametrize("precision", fp.PRECISIONS)
+def test_stops_reading_after_window(tmp_path, precision):
+    # Khoảng thời gian ở đầu file: dừng đọc ngay sau end
+    path = tripwire_log(tmp_path, 100_000)
+    df, _, _ = fp.read_signal_window(path, ["vNE"], *WINDOW, chunksize=10_000, precision=precision)
+    assert len(df) == WINDOW[1] - WINDOW[0] + 1
+
+@pytest.mark.parametrize("precision", fp.PRECISIONS)
+def test_cold_cache_narrow_window_seeks(tmp_path, precision):
+    # Cache còn trống, khoảng hẹp giữa file: nhảy tới vùng cần đọc và dừng
+    # sau end, không parse cả file
+    path = tripwire_log(tmp_path, 400_010)
+    start, end = 210_000, 212_000
+    df, _, _ = fp.read_signal_window(path, ["vNE"], start, end, chunksize=10_000, cache=LogCache(tmp_path / "cache"),
+                                     precision=precision)
+    assert df.index[0] == start and len(df) == end - start + 1
+
+@pytest.mark.parametrize("suffix", [".zip", ".csv.gz"])
+def test_archive_member_stops_reading_after_window(tmp_path, suffix):
+    # File trong file nén không có cache: dừng giải nén ngay sau end
+    path = tripwire_log(tmp_path, 100_000)
+    archive = tmp_path / f"long{suffix}"
+    if suffix == ".zip":
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.write(path, path.name)
+    else:
+        with open(path, "rb") as source, gzip.open(archive, "wb") as target:
+            shutil.copyfileobj(source, target)
+    member, = archive_members(archive)
+    df, _, _ = fp.read_signal_window(member, ["vNE"], *WINDOW, chunksize=10_000)
+    assert len(df) == WINDOW[1] - WINDOW[0] + 1
@@ -0,0 +1,82 @@
+from pathlib import Path
+import numpy as np
+
+# Cứ mỗi INDEX_STRIDE dòng thì ghi lại (thời gian, vị trí byte) của dòng đó
+INDEX_STRIDE = 50_000
+# Kích thước mỗi khối byte khi quét file để đếm dòng
+SCAN_BLOCK_BYTES = 16 * 1024 * 1024
+
+def build_time_index(file_path: Path, stride=INDEX_STRIDE, block_size=SCAN_BLOCK_BYTES):
+    """Quét file CSV ở mức byte, tạo index thưa: thời gian -> vị trí byte.
+
+    Trả về dict gồm các mảng "time", "offset", "row" (vị trí bắt đầu dòng thứ
+    row, tính từ dòng dữ liệu đầu tiên) và tổng số dòng "rows". Trả về None nếu
+    không đọc được giá trị thời gian dạng số. Giả định mỗi dòng dữ liệu nằm
+    trên một dòng vật lý (không có xuống dòng trong ô).
+    """
+    offsets = []
+    rows = []
+    with open(file_path, "rb") as f:
+        f.readline()
+        data_start = f.tell()
+        pos = data_start
+        row = 0
+        last_byte = b"\n"
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10)
+            # Dòng thứ row + i + 1 bắt đầu ngay sau ký tự xuống dòng thứ i của khối
+            line_rows = row + 1 + np.arange(len(newlines))
+            picked = line_rows % stride == 0
+            offsets.extend((pos + newlines[picked] + 1).tolist())
+            rows.extend(line_rows[picked].tolist())
+            row += len(newlines)
+            pos += len(block)
+            last_byte = block[-1:]
+        # Dòng cuối không có ký tự xuống dòng vẫn là một dòng dữ liệu
+        total_rows = row if last_byte == b"\n" else row + 1
+
+        offsets = [data_start] + offsets
+        rows = [0] + rows
+        times = []
+        for offset in offsets:
+            f.seek(offset)
+            line = f.readline()
+            if not line.strip():
+                break
+            try:
+                times.append(float(line.split(b",", 1)[0].strip().strip(b'"')))
+            except ValueError:
+                return None
+
+    count = len(times)
+    return {
+        "time": np.asarray(times, dtype=np.float64),
+        "offset": np.asarray(offsets[:count], dtype=np.int64),
+        "row": np.asarray(rows[:count], dtype=np.int64),
+        "rows": total_rows,
+    }
+
+def is_sorted(values) -> bool:
+    values = np.asarray(values)
+    return bool(np.all(values[1:] >= values[:-1]))
+
+def find_seek_point(index: dict, start):
+    """Trả về (offset, row) của điểm index cuối cùng có thời gian < start."""
+    k = int(np.searchsorted(index["time"], start, side="left")) - 1
+    if k < 0:
+        return None
+    return int(index["offset"][k]), int(index["row"][k])
+
+def window_fraction(index: dict, start, end) -> float:
+    # Ước lượng tỉ lệ số dòng của file nằm trong khoảng [start, end]
+    total = index["rows"]
+    if total <= 0:
+        return 1.0
+    k0 = int(np.searchsorted(index["time"], start, side="left")) - 1
+    k1 = int(np.searchsorted(index["time"], end, side="right"))
+    first_row = index["row"][k0] if k0 >= 0 else 0
+    last_row = index["row"][k1] if k1 < len(index["row"]) else total
+    return (last_row - first_row) / total